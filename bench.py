@@ -0,0 +1,225 @@
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+
+from game.go_game import GoGame
+from game.mct import MonteCarloTree
+from game.playout import light_playout
+
+BOARD_SIZES = (5, 9, 13, 19)
+# Light policy best_move playouts per second at 19x19 on one core, the minimum --check enforces
+PLAYOUT_TARGET = 200
+
+
+def record_game(board_size, seed):
+    """
+    Plays a light random game from the empty board and records it.
+
+    Returns:
+    tuple: The moves played as make_move arguments, and the position after every move.
+    """
+    random.seed(seed)
+    game = GoGame(board_size)
+    size = board_size
+    moves = []
+    positions = []
+    for move in light_playout(game.clone()):
+        moves.append(("pass", 0) if move == size * size else divmod(move, size))
+        game.make_move(*moves[-1])
+        positions.append(game.clone())
+    return moves, positions
+
+
+def measure(function, min_time):
+    """
+    Calls the function repeatedly for at least min_time seconds.
+
+    Returns:
+    tuple: The number of operations the calls made, as returned by the function, and the seconds taken.
+    """
+    operations = 0
+    start = time.perf_counter()
+    while True:
+        operations += function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return operations, elapsed
+
+
+def bench_game(board_size, seed, min_time):
+    """
+    Measures the GoGame hot paths on the positions of one recorded game.
+
+    Returns:
+    list: One result dictionary per method.
+    """
+    moves, positions = record_game(board_size, seed)
+
+    def replay():
+        game = GoGame(board_size)
+        for move in moves:
+            game.make_move(*move)
+        return len(moves)
+
+    def over_positions(method):
+        def run():
+            for position in positions:
+                method(position)
+            return len(positions)
+        return run
+
+    benchmarks = {
+        'make_move': replay,
+        'get_valid_moves': over_positions(GoGame.get_valid_moves),
+        'find_groups': over_positions(GoGame.find_groups),
+        'calculate_score': over_positions(GoGame.calculate_score),
+        'fast_score': over_positions(GoGame.fast_score),
+        'clone': over_positions(GoGame.clone),
+    }
+    results = []
+    for name, function in benchmarks.items():
+        operations, elapsed = measure(function, min_time)
+        results.append({'name': name, 'board_size': board_size, 'operations': operations,
+                        'seconds': elapsed, 'per_second': operations / elapsed})
+    return results
+
+
+def bench_scaling(board_size, seed, min_time):
+    """
+    Measures light playouts from the empty board, each scored with fast_score.
+    Their cost per board point should stay about the same across board sizes.
+
+    Returns:
+    dict: The result, with the playouts per second and the microseconds per board point.
+    """
+    random.seed(seed)
+    moves = 0
+
+    def playout():
+        nonlocal moves
+        game = GoGame(board_size)
+        moves += len(light_playout(game))
+        game.fast_score()
+        return 1
+
+    operations, elapsed = measure(playout, min_time)
+    return {'name': 'light_playout', 'board_size': board_size, 'operations': operations,
+            'seconds': elapsed, 'per_second': operations / elapsed,
+            'us_per_point': elapsed / operations / (board_size * board_size) * 1e6,
+            'mean_moves': moves / operations}
+
+
+def count_nodes(node):
+    """
+    Counts the nodes of a search tree.
+    """
+    count = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(node.children)
+    return count
+
+
+def bench_search(board_size, seed, iterations, policy):
+    """
+    Measures MonteCarloTree.best_move from the empty board end to end.
+
+    Returns:
+    dict: The result, with the playouts and the tree nodes created per second.
+    """
+    random.seed(seed)
+    tree = MonteCarloTree(GoGame(board_size), policy=policy)
+    start = time.perf_counter()
+    tree.best_move(iterations)
+    elapsed = time.perf_counter() - start
+    playouts = tree.iterations_run * tree.playouts_per_leaf
+    nodes = count_nodes(tree.root)
+    return {'name': f'best_move[{policy}]', 'board_size': board_size, 'operations': playouts,
+            'seconds': elapsed, 'per_second': playouts / elapsed, 'nodes': nodes,
+            'nodes_per_second': nodes / elapsed}
+
+
+def revision():
+    """
+    Returns the git revision of the working tree, or None outside a git checkout.
+    """
+    try:
+        output = subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def compare(results, baseline):
+    """
+    Prints the speed of every result relative to the matching result of a baseline run.
+    """
+    previous = {(result['name'], result['board_size']): result for result in baseline['results']}
+    for result in results:
+        old = previous.get((result['name'], result['board_size']))
+        if old is not None:
+            ratio = result['per_second'] / old['per_second']
+            print(f"{result['name']:>24} {result['board_size']:>3}x{result['board_size']:<3} {ratio:6.2f}x",
+                  file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks the GoGame and MonteCarloTree hot paths.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=BOARD_SIZES, help="board sizes to run")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the recorded games and searches")
+    parser.add_argument('--min-time', type=float, default=0.5, help="seconds to run each GoGame benchmark")
+    parser.add_argument('--iterations', type=int, default=200, help="iterations of each search")
+    parser.add_argument('--policies', nargs='+', default=['uniform', 'light'], help="playout policies to search with")
+    parser.add_argument('--output', help="file to write the JSON results to, instead of standard output")
+    parser.add_argument('--compare', help="JSON results of an earlier run to print speed ratios against")
+    parser.add_argument('--scaling', action='store_true',
+                        help="only measure how the cost of a light playout grows with the board area")
+    parser.add_argument('--check', action='store_true',
+                        help=f"fail unless light searches reach {PLAYOUT_TARGET} playouts per second at 19x19")
+    args = parser.parse_args(argv)
+
+    results = []
+    for board_size in args.sizes:
+        if args.scaling:
+            results.append(bench_scaling(board_size, args.seed, args.min_time))
+            continue
+        results.extend(bench_game(board_size, args.seed, args.min_time))
+        for policy in args.policies:
+            results.append(bench_search(board_size, args.seed, args.iterations, policy))
+    if args.check and not any(result['name'] == 'best_move[light]' and result['board_size'] == 19
+                              for result in results):
+        results.append(bench_search(19, args.seed, args.iterations, 'light'))
+
+    report = {
+        'revision': revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        with open(args.compare) as file:
+            compare(results, json.load(file))
+    if args.check:
+        rates = [result['per_second'] for result in results
+                 if result['name'] == 'best_move[light]' and result['board_size'] == 19]
+        if not rates or rates[0] < PLAYOUT_TARGET:
+            print(f"19x19 light search below the target of {PLAYOUT_TARGET} playouts per second", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
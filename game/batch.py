@@ -0,0 +1,396 @@
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for batch playouts
+    np = None
+
+from .go_game import EMPTY, BLACK, WHITE, BORDER, _STONES, _board_tables
+
+# Byte masks of the flags of the neighbours before each of the four neighbours, see _words
+_EARLIER = None if np is None else np.array((0x0, 0xff, 0xffff, 0xffffff), dtype=np.uint32)
+
+
+def _words(flags):
+    """
+    Reads every row of an (n, 4) boolean array as one little-endian 32-bit word, one byte per flag, so that
+    checking or counting the four flags is one operation instead of a slow reduction along a short axis.
+    """
+    return np.ascontiguousarray(flags).view('<u4')[:, 0]
+
+
+def _count(flags):
+    """
+    Counts the set flags of every row of an (n, 4) boolean array: multiplying adds the four bytes
+    of the word up into its top byte.
+    """
+    return ((_words(flags) * np.uint32(0x01010101)) >> np.uint32(24)).astype(np.int32)
+
+
+class BatchPlayout:
+    """
+    Runs many light random playouts of one position at once, with the boards stacked in a NumPy array.
+    Every move only touches the cells around the stone played: chains are kept as union-find trees with
+    a pseudo-liberty count at their root, the number of stone and empty cell adjacencies, which is zero
+    exactly when the chain has no liberty. Whole boards are only scanned to remove captured chains and
+    to score the final positions.
+
+    Playouts follow the light policy: every board picks a random empty point, rejects it if it is one
+    of the player's own eyes or suicide and picks another, and passes only when no other point is left.
+    Ko is checked like GoGame does, and every playout also stops after max_moves moves.
+    """
+    def __init__(self, board_size, max_moves=None, tries=8, seed=None):
+        """
+        Parameters:
+        board_size (int): The size of the boards played out.
+        max_moves (int, optional): The most moves in a playout. Defaults to three times the board area.
+        tries (int, optional): The random points a board tries at once after its first one is not playable,
+        before checking all of them. Defaults to 8.
+        seed (int, optional): The seed of the random generator. Defaults to None.
+        """
+        if np is None:
+            raise ImportError("BatchPlayout requires NumPy, install it with 'pip install numpy'")
+        tables = _board_tables(board_size)
+        self.board_size = board_size
+        self.max_moves = max_moves if max_moves is not None else 3 * board_size * board_size
+        self.tries = tries
+        self.rng = np.random.default_rng(seed)
+        self.area = tables.area
+        self.points = np.array(tables.points, dtype=np.int32)
+
+        # Neighbour indexes of every cell, border cells point at themselves
+        self.neighbors = np.repeat(np.arange(self.area)[:, None], 4, axis=1)
+        for point in tables.points:
+            self.neighbors[point] = tables.neighbors[point]
+        width = self.width = tables.width
+        self.neighbor_offsets = np.array((1, -1, width, -width), dtype=np.int32)
+        self.diagonal_offsets = np.array((width + 1, width - 1, -width + 1, -width - 1), dtype=np.int32)
+
+        # The boards being played out, see reset
+        self.boards = None
+
+    def reset(self, game, count):
+        """
+        Sets up count copies of the game's position to play out. The boards, the chain parents, the
+        pseudo-liberty counts and chain sizes, the empty points and the ko points of every board are flat
+        arrays indexed by board * area + cell, so that the neighbours of any cell are at fixed offsets.
+
+        Parameters:
+        game (GoGame): The position to play out, which is left unchanged.
+        count (int): The number of boards.
+        """
+        area = self.area
+        cells = np.frombuffer(bytes(game._cells), dtype=np.int8)
+        self.boards = np.tile(cells, count)
+        bases = np.arange(count, dtype=np.int32)[:, None] * area
+
+        # Every chain points at one of its stones, every other cell at itself
+        stones = (cells == BLACK) | (cells == WHITE)
+        labels = np.where(stones, self.label(cells[None, :])[0], np.arange(area)).astype(np.int32)
+        self.parent = (bases + labels).ravel()
+        adjacencies = np.where(stones, (cells[self.neighbors] == EMPTY).sum(axis=1), 0)
+        libs = np.zeros(area, dtype=np.int32)
+        np.add.at(libs, labels[stones], adjacencies[stones])
+        self.libs = np.tile(libs, count)
+        self.sizes = np.tile(np.bincount(labels[stones], minlength=area).astype(np.int32), count)
+
+        empties = self.points[cells[self.points] == EMPTY]
+        self.empties = np.zeros((count, len(self.points)), dtype=np.int32)
+        self.empties[:, :len(empties)] = bases + empties
+        self.counts = np.full(count, len(empties), dtype=np.int32)
+        # The point of the single stone captured by the last move, or -1
+        self.ko = np.full(count, -1, dtype=np.int32)
+        if game.potential_ko:
+            row, col = game.potential_ko
+            self.ko[:] = bases[:, 0] + (row + 1) * self.width + col + 1
+
+    def find(self, cells):
+        """
+        Returns the chain roots of the given cells, pointing the cells straight at their roots.
+        Empty and border cells are their own roots.
+        """
+        parent = self.parent
+        roots = parent[cells]
+        while True:
+            up = parent[roots]
+            if np.array_equal(up, roots):
+                break
+            roots = up
+        parent[cells] = roots
+        return roots
+
+    def evaluate(self, points, player):
+        """
+        Checks whether the player may play each of the given points, each on its own board, from the cells
+        around it alone: the point must not be one of the player's eyes, the stone must keep a liberty
+        or capture an enemy chain, and it must not retake a ko.
+
+        Parameters:
+        points (ndarray): Empty points, as board * area + cell.
+        player (int): BLACK or WHITE.
+
+        Returns:
+        tuple: Whether each point is legal, and the chain roots of its neighbours, which of them are
+        distinct friendly chains, which are enemy stones and which are enemy chains captured,
+        the pseudo-liberties and the size of the chain the new stone would be part of, and the ko point
+        the move would leave, as commit takes them.
+        """
+        boards = self.boards
+        enemy = 3 - player
+        around = points[:, None] + self.neighbor_offsets
+        cells = boards[around]
+        own = cells == player
+        foe = cells == enemy
+        eye = _words(own | (cells == BORDER)) == 0x01010101
+        suspects = np.flatnonzero(eye)
+        if suspects.size:
+            diagonals = boards[points[suspects, None] + self.diagonal_offsets]
+            eye[suspects] = _count(diagonals == enemy) + (_words(diagonals == BORDER) != 0) < 2
+
+        roots = self.find(around)
+        chain_libs = self.libs[roots]
+        # Stones of one chain next to the point count its liberties once, and each takes one of them away.
+        # For every neighbour, a word with one byte per neighbour in the same chain, see _words.
+        same = (roots[:, :, None] == roots[:, None, :]).view('<u4')[:, :, 0]
+        hits = ((same * np.uint32(0x01010101)) >> np.uint32(24)).astype(np.int32)
+        first = (same & _EARLIER) == 0
+        merged = own & first
+        captured = foe & (chain_libs == hits)
+        merged_libs = np.where(merged, chain_libs, 0)
+        new_libs = (_count(cells == EMPTY) - _count(own) + merged_libs[:, 0] + merged_libs[:, 1]
+                    + merged_libs[:, 2] + merged_libs[:, 3])
+        chain_sizes = self.sizes[roots]
+        merged_sizes = np.where(merged, chain_sizes, 0)
+        new_size = 1 + merged_sizes[:, 0] + merged_sizes[:, 1] + merged_sizes[:, 2] + merged_sizes[:, 3]
+        taken = np.where(captured & first, chain_sizes, 0)
+        taken = taken[:, 0] + taken[:, 1] + taken[:, 2] + taken[:, 3]
+
+        # A single captured stone is its own root, and becomes the ko point
+        single = np.where(captured, roots, -1)
+        single = np.where(taken == 1, np.maximum(np.maximum(single[:, 0], single[:, 1]),
+                                                 np.maximum(single[:, 2], single[:, 3])), -1)
+        legal = ~eye & ((new_libs > 0) | (taken > 0))
+        ko = self.ko[points // self.area]
+        if (ko >= 0).any():
+            distance = np.abs(single - ko)
+            legal &= (single < 0) | (ko < 0) | ((distance != 1) & (distance != self.width))
+        return legal, (roots, merged, foe, captured, new_libs, new_size, single)
+
+    def step(self, player, active, captures):
+        """
+        Plays one move for the player on every active board, capturing enemy chains left without
+        liberties. Boards with no playable point pass.
+
+        Every board first tries one random empty point, which is playable on most boards, then the boards
+        where it is not try a few more at once, and the boards left check all their empty points. Each time
+        the first legal point drawn is played, which is a uniform choice among the legal points just like
+        retrying random points one at a time.
+
+        Parameters:
+        player (int): BLACK or WHITE.
+        active (ndarray): Whether each board is still being played out.
+        captures (ndarray): The player's captures on every board, updated in place.
+
+        Returns:
+        ndarray: Whether each board placed a stone.
+        """
+        counts = self.counts
+        placed = np.zeros(len(active), dtype=bool)
+        rows = np.flatnonzero(active & (counts > 0))
+        for tries in (1, self.tries):
+            if rows.size == 0:
+                break
+            slots = (self.rng.random((rows.size, tries)) * counts[rows][:, None]).astype(np.int32)
+            rows = self.play_first_legal(rows, slots, player, captures, placed)
+
+        if rows.size:
+            width = self.empties.shape[1]
+            slots = np.broadcast_to(np.arange(width, dtype=np.int32), (rows.size, width))
+            valid = slots < counts[rows][:, None]
+            # Shuffles the candidates, so that the first legal one is a random one
+            order = np.argsort(np.where(valid, self.rng.random(valid.shape), 2.0), axis=1)
+            self.play_first_legal(rows, np.take_along_axis(slots, order, axis=1), player, captures, placed,
+                                  np.take_along_axis(valid, order, axis=1))
+        # A pass ends any ko
+        self.ko[active & ~placed] = -1
+        return placed
+
+    def play_first_legal(self, rows, slots, player, captures, placed, valid=None):
+        """
+        Plays, on every given board, the first legal point among its candidates.
+
+        Parameters:
+        rows (ndarray): The boards to play on.
+        slots (ndarray): The candidates of every board, as positions in its empty points, one row per board.
+        player (int): BLACK or WHITE.
+        captures (ndarray): The player's captures on every board, updated in place.
+        placed (ndarray): Whether each board placed a stone, updated in place.
+        valid (ndarray, optional): Which of the candidates to check. Defaults to None, all of them.
+
+        Returns:
+        ndarray: The boards without any legal candidate.
+        """
+        points = self.empties[rows[:, None], slots]
+        if valid is None:
+            legal, move = self.evaluate(points.ravel(), player)
+            playable = legal.reshape(points.shape)
+        else:
+            legal, move = self.evaluate(points[valid], player)
+            playable = np.zeros(valid.shape, dtype=bool)
+            playable[valid] = legal
+        found = playable.any(axis=1)
+        if found.any():
+            first = playable.argmax(axis=1)[found]
+            # The position of every point played among the candidates evaluated
+            if valid is None:
+                chosen = np.flatnonzero(found) * points.shape[1] + first
+            else:
+                chosen = (np.cumsum(valid, axis=1) - 1)[found, first]
+                chosen += (np.cumsum(valid.sum(axis=1)) - valid.sum(axis=1))[found]
+            played = rows[found]
+            self.commit(played, points[found, first], slots[found, first], *(part[chosen] for part in move),
+                        player, captures)
+            placed[played] = True
+        return rows[~found]
+
+    def commit(self, rows, points, slots, roots, merged, foe, captured, new_libs, new_size, ko, player, captures):
+        """
+        Places the stones found legal by evaluate: removes each point from its board's empty points, joins the
+        friendly chains around it under one root, takes a liberty from every adjacent enemy stone's chain
+        and removes the captured chains.
+
+        Parameters:
+        rows (ndarray): The boards playing, each once.
+        points (ndarray): The points played, as board * area + cell.
+        slots (ndarray): The position of each point among its board's empty points.
+        player (int): BLACK or WHITE.
+        captures (ndarray): The player's captures on every board, updated in place.
+        The other parameters are the details of the points from evaluate.
+        """
+        counts = self.counts[rows] - 1
+        self.counts[rows] = counts
+        self.empties[rows, slots] = self.empties[rows, counts]
+        self.boards[points] = player
+
+        root = np.where(_words(merged) != 0, roots[np.arange(len(rows)), merged.argmax(axis=1)], points)
+        self.parent[roots[merged]] = np.broadcast_to(root[:, None], merged.shape)[merged]
+        self.parent[points] = root
+        self.libs[root] = new_libs
+        self.sizes[root] = new_size
+        self.ko[rows] = ko
+        np.subtract.at(self.libs, roots[foe], 1)
+
+        capturing = _words(captured) != 0
+        if capturing.any():
+            self.remove(rows[capturing], roots[capturing][captured[capturing]], 3 - player, captures)
+
+    def remove(self, rows, dead_roots, color, captures):
+        """
+        Removes the chains with the given roots from the given boards, returning their points to the
+        empty points and their liberties to the neighbouring chains.
+        """
+        area = self.area
+        cells = (rows[:, None] * area + np.arange(area, dtype=np.int32)).ravel()
+        roots = self.find(cells)
+        dead_root = np.zeros(len(self.boards), dtype=bool)
+        dead_root[dead_roots] = True
+        dead = cells[dead_root[roots] & (self.boards[cells] == color)]
+
+        self.boards[dead] = EMPTY
+        self.parent[dead] = dead
+        board_rows = dead // area
+        lost = np.bincount(board_rows, minlength=len(captures))
+        captures += lost
+
+        around = (dead[:, None] + self.neighbor_offsets).ravel()
+        stones = around[self.boards[around] == 3 - color]
+        np.add.at(self.libs, self.find(stones), 1)
+
+        # The dead points are grouped by board, in order, so each goes after its board's empty points
+        starts = np.cumsum(lost) - lost
+        slots = self.counts[board_rows] + np.arange(len(dead)) - starts[board_rows]
+        self.empties[board_rows, slots] = dead
+        self.counts += lost.astype(np.int32)
+
+    def label(self, boards):
+        """
+        Labels the connected groups of equal cells, stones and empty regions alike, on every board.
+
+        Parameters:
+        boards (ndarray): The boards, one flat row of cells per board.
+
+        Returns:
+        ndarray: For every cell, the smallest cell index of its group, unique within the board.
+        """
+        count = boards.shape[0]
+        labels = np.broadcast_to(np.arange(self.area, dtype=np.int16), (count, self.area)).copy()
+        same = (boards[:, self.neighbors] == boards[:, :, None]) & (boards != BORDER)[:, :, None]
+        while True:
+            linked = np.where(same, labels[:, self.neighbors], self.area).min(axis=2)
+            updated = np.minimum(labels, linked)
+            # Pointer jumping, every cell takes the label of the cell its label points to
+            updated = np.take_along_axis(updated, updated, axis=1)
+            if np.array_equal(updated, labels):
+                return labels
+            labels = updated
+
+    def score(self, boards, b_captures, w_captures):
+        """
+        Scores every board like GoGame.calculate_score: each player gets the empty regions bordered only
+        by their stones, plus the stones they captured. The colors next to every empty cell are spread
+        through the empty regions as a bit mask, one black bit and one white bit, which takes as many
+        passes as the widest region, and only a few once a playout has filled the board.
+
+        Parameters:
+        boards (ndarray): The boards, one flat row of cells per board.
+        b_captures (ndarray): The black captures of every board.
+        w_captures (ndarray): The white captures of every board.
+
+        Returns:
+        tuple: The black scores and the white scores, one per board.
+        """
+        cells = boards.ravel()
+        empty = cells == EMPTY
+        reach = (cells == BLACK).view(np.int8) | ((cells == WHITE).view(np.int8) << 1)
+        width = self.width
+        # Every cell next to a point is on the same board, border cells are never empty
+        inner = slice(width, len(cells) - width)
+        while True:
+            spread = reach.copy()
+            spread[inner] |= (reach[width + 1:len(cells) - width + 1] | reach[width - 1:len(cells) - width - 1]
+                              | reach[2 * width:] | reach[:len(cells) - 2 * width])
+            spread[~empty] = reach[~empty]
+            if np.array_equal(spread, reach):
+                break
+            reach = spread
+        reach = reach.reshape(boards.shape)
+        empty = empty.reshape(boards.shape)
+        b_scores = (empty & (reach == 1)).sum(axis=1) + b_captures
+        w_scores = (empty & (reach == 2)).sum(axis=1) + w_captures
+        return b_scores, w_scores
+
+    def run(self, game, count):
+        """
+        Plays out the given position count times.
+
+        Parameters:
+        game (GoGame): The position to play out, which is left unchanged.
+        count (int): The number of playouts.
+
+        Returns:
+        tuple: The black scores and the white scores of the final positions, one per playout.
+        """
+        self.reset(game, count)
+        b_captures = np.full(count, game.b_captures)
+        w_captures = np.full(count, game.w_captures)
+        pass_counter = np.full(count, game.pass_counter)
+        active = np.full(count, not game.is_over)
+        player = _STONES[game.current_player]
+
+        for _ in range(self.max_moves):
+            if not active.any():
+                break
+            placed = self.step(player, active, b_captures if player == BLACK else w_captures)
+            pass_counter = np.where(placed, 0, pass_counter + active)
+            active &= pass_counter < 4
+            player = 3 - player
+
+        return self.score(self.boards.reshape(count, self.area), b_captures, w_captures)
@@ -0,0 +1,247 @@
+import argparse
+import mmap
+import random
+import struct
+from collections import deque
+
+from .go_game import EMPTY, GoGame, _board_tables
+from .mct import MonteCarloTree
+
+# File header: magic, board size, number of entries
+_HEADER = struct.Struct('<8sII')
+_MAGIC = b'GOBOOK1\0'
+# Entry: canonical position key, canonical move, visits of the move when the book was built
+_ENTRY = struct.Struct('<QII')
+
+_SYMMETRIES = {}
+
+
+def _symmetries(board_size):
+    """
+    Returns the eight symmetries of the board as permutations of the packed points, row * board_size + col,
+    with their inverses, building them on first use.
+
+    Returns:
+    tuple: The permutations, and their inverse permutations.
+    """
+    tables = _SYMMETRIES.get(board_size)
+    if tables is None:
+        last = board_size - 1
+        transforms = (
+            lambda row, col: (row, col),
+            lambda row, col: (col, last - row),
+            lambda row, col: (last - row, last - col),
+            lambda row, col: (last - col, row),
+            lambda row, col: (row, last - col),
+            lambda row, col: (last - row, col),
+            lambda row, col: (col, row),
+            lambda row, col: (last - col, last - row),
+        )
+        permutations = []
+        inverses = []
+        for transform in transforms:
+            permutation = [0] * (board_size * board_size)
+            for row in range(board_size):
+                for col in range(board_size):
+                    new_row, new_col = transform(row, col)
+                    permutation[row * board_size + col] = new_row * board_size + new_col
+            inverse = [0] * len(permutation)
+            for point, image in enumerate(permutation):
+                inverse[image] = point
+            permutations.append(permutation)
+            inverses.append(inverse)
+        tables = _SYMMETRIES[board_size] = (permutations, inverses)
+    return tables
+
+
+def canonical_key(game):
+    """
+    Returns the position key shared by all eight rotations and reflections of the game's position:
+    the smallest Zobrist hash of the stones and the player to move over the symmetries.
+
+    Returns:
+    tuple: The key, and the index of the symmetry that maps the position onto its canonical orientation.
+    """
+    size = game.board_size
+    tables = _board_tables(size)
+    permutations, _ = _symmetries(size)
+    cells = game._cells
+    stones = [(index, cells[point]) for index, point in enumerate(tables.points) if cells[point] != EMPTY]
+    to_move = tables.zobrist_to_move if game.current_player == 'W' else 0
+    points = tables.points
+    zobrist = tables.zobrist
+
+    best_key = None
+    best_symmetry = 0
+    for symmetry, permutation in enumerate(permutations):
+        key = to_move
+        for index, color in stones:
+            key ^= zobrist[color][points[permutation[index]]]
+        if best_key is None or key < best_key:
+            best_key = key
+            best_symmetry = symmetry
+    return best_key, best_symmetry
+
+
+def bookable(game):
+    """
+    Checks whether a position can be kept in a book: the game is not over, no ko is pending
+    and no pass was just played. Captures are not part of the key.
+    """
+    return not game.is_over and game.potential_ko is None and not game.pass_counter
+
+
+def write_book(path, board_size, entries):
+    """
+    Writes a book file, with its entries sorted by key so that lookups can binary search the mapped file.
+
+    Parameters:
+    path (str): The file to write.
+    board_size (int): The size of the board of every position.
+    entries (dict): The canonical move and its visits, keyed by canonical position key.
+    """
+    with open(path, 'wb') as file:
+        file.write(_HEADER.pack(_MAGIC, board_size, len(entries)))
+        for key in sorted(entries):
+            move, visits = entries[key]
+            file.write(_ENTRY.pack(key, move, visits))
+
+
+class OpeningBook:
+    """
+    A read-only opening book mapped from a file written by write_book. Positions are looked up by
+    their canonical key, so a book built from one orientation answers all eight.
+    """
+    def __init__(self, path):
+        """
+        Parameters:
+        path (str): The book file.
+        """
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.board_size, self.count = _HEADER.unpack_from(self.data, 0)
+        if magic != _MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not an opening book")
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def find(self, key):
+        """
+        Binary searches the entries for a canonical key.
+
+        Returns:
+        tuple: The canonical move and its visits, or None if the key is not in the book.
+        """
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            entry_key, move, visits = _ENTRY.unpack_from(self.data, _HEADER.size + middle * _ENTRY.size)
+            if entry_key == key:
+                return move, visits
+            if entry_key < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def lookup(self, game):
+        """
+        Returns the book move of the game's position, in the game's own orientation.
+
+        Returns:
+        tuple: The move as (row, col) or ("pass", 0), or None if the position is not in the book
+        or the book move is not legal in it.
+        """
+        size = game.board_size
+        if size != self.board_size or not bookable(game):
+            return None
+        key, symmetry = canonical_key(game)
+        entry = self.find(key)
+        if entry is None:
+            return None
+        move = entry[0]
+        if move == size * size:
+            return ("pass", 0)
+        _, inverses = _symmetries(size)
+        action = divmod(inverses[symmetry][move], size)
+        return action if game.is_legal(*action) else None
+
+
+def build_book(path, board_size, depth=4, width=3, iterations=2000, seed=0, **options):
+    """
+    Builds an opening book by searching the early positions breadth first from the empty board.
+    Every position gets its best move from a search of the given iterations, and the positions after
+    its width most visited moves are searched next, down to depth moves from the empty board.
+    Positions equal up to symmetry are searched once.
+
+    Parameters:
+    path (str): The book file to write.
+    board_size (int): The size of the board.
+    depth (int, optional): The number of moves from the empty board covered. Defaults to 4.
+    width (int, optional): The number of moves of every position followed. Defaults to 3.
+    iterations (int, optional): The iterations of every search. Defaults to 2000.
+    seed (int, optional): The seed of the searches. Defaults to 0.
+    options: The keyword arguments of MonteCarloTree, such as policy.
+
+    Returns:
+    int: The number of positions in the book.
+    """
+    random.seed(seed)
+    permutations, _ = _symmetries(board_size)
+    entries = {}
+    frontier = deque([(GoGame(board_size), 0)])
+    while frontier:
+        game, ply = frontier.popleft()
+        if not bookable(game):
+            continue
+        key, symmetry = canonical_key(game)
+        if key in entries:
+            continue
+        tree = MonteCarloTree(game, **options)
+        try:
+            best = tree.best_move(iterations)
+        finally:
+            tree.close()
+        move = tree.encode_action(best)
+        if move != tree.pass_move:
+            move = permutations[symmetry][move]
+        entries[key] = (move, tree.get_best_child(tree.root).visits)
+
+        if ply + 1 < depth:
+            children = sorted(tree.root.children, key=lambda child: child.visits, reverse=True)[:width]
+            for child in children:
+                next_game = game.clone()
+                next_game.make_move(*tree.decode_action(child.move))
+                frontier.append((next_game, ply + 1))
+    write_book(path, board_size, entries)
+    return len(entries)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Builds an opening book by searching the early positions.")
+    parser.add_argument('path', help="book file to write")
+    parser.add_argument('--size', type=int, default=9, help="size of the board")
+    parser.add_argument('--depth', type=int, default=4, help="number of moves from the empty board covered")
+    parser.add_argument('--width', type=int, default=3, help="number of moves of every position followed")
+    parser.add_argument('--iterations', type=int, default=2000, help="iterations of every search")
+    parser.add_argument('--policy', default='light', help="playout policy of the searches")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the searches")
+    args = parser.parse_args(argv)
+    count = build_book(args.path, args.size, args.depth, args.width, args.iterations, args.seed, policy=args.policy)
+    print(f"Wrote {count} positions to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,149 @@
+import random
+
+EMPTY = 0
+BLACK = 1
+WHITE = 2
+BORDER = 3
+
+_STONES = {' ': EMPTY, 'B': BLACK, 'W': WHITE}
+_SYMBOLS = (' ', 'B', 'W', '#')
+
+
+class _BoardTables:
+    """
+    Precomputed tables shared by every game of one board size.
+    The board is stored as a flat array of (board_size + 2) x (board_size + 2) cells
+    whose outer ring is a border of sentinel cells, so neighbours never need a bounds check.
+    The Zobrist keys come from a generator seeded with the board size, so every process
+    hashes the same position to the same value.
+    """
+    def __init__(self, board_size):
+        self.board_size = board_size
+        self.width = board_size + 2
+        self.area = self.width * self.width
+        self.points = [(row + 1) * self.width + col + 1 for row in range(board_size) for col in range(board_size)]
+
+        self.coords = [None] * self.area
+        self.neighbors = [()] * self.area
+        self.diagonals = [()] * self.area
+        self.empty_cells = bytearray([BORDER]) * self.area
+        self.zeros = bytes(self.area)
+        for point in self.points:
+            row, col = divmod(point, self.width)
+            self.coords[point] = (row - 1, col - 1)
+            self.neighbors[point] = (point + 1, point - 1, point + self.width, point - self.width)
+            self.diagonals[point] = (point + self.width + 1, point + self.width - 1,
+                                     point - self.width + 1, point - self.width - 1)
+            self.empty_cells[point] = EMPTY
+
+        rng = random.Random(board_size)
+        self.zobrist = [None, [0] * self.area, [0] * self.area]
+        for point in self.points:
+            self.zobrist[BLACK][point] = rng.getrandbits(64)
+            self.zobrist[WHITE][point] = rng.getrandbits(64)
+        self.zobrist_to_move = rng.getrandbits(64)
+
+    def __reduce__(self):
+        # Games sent to other processes share that process's tables instead of copying them
+        return (_board_tables, (self.board_size,))
+
+
+_TABLES = {}
+
+
+def _board_tables(board_size):
+    """
+    Returns the precomputed tables for the given board size, building them on first use.
+    """
+    tables = _TABLES.get(board_size)
+    if tables is None:
+        tables = _TABLES[board_size] = _BoardTables(board_size)
+    return tables
+
+
+class _BoardRow:
+    """
+    A live view of one row of a game's board, holding 'B', 'W' or ' ' for every column.
+    Assigning to a column writes through to the game and marks its chains for a rebuild.
+    """
+    __slots__ = ('_game', '_start')
+
+    def __init__(self, game, row):
+        self._game = game
+        self._start = (row + 1) * game._tables.width + 1
+
+    def _point(self, col):
+        size = self._game.board_size
+        if col < 0:
+            col += size
+        if not 0 <= col < size:
+            raise IndexError('board column out of range')
+        return self._start + col
+
+    def __len__(self):
+        return self._game.board_size
+
+    def __getitem__(self, col):
+        if isinstance(col, slice):
+            return list(self)[col]
+        return _SYMBOLS[self._game._cells[self._point(col)]]
+
+    def __setitem__(self, col, value):
+        self._game._cells[self._point(col)] = _STONES[value]
+        self._game._chains_dirty = True
+
+    def __iter__(self):
+        cells = self._game._cells
+        for point in range(self._start, self._start + self._game.board_size):
+            yield _SYMBOLS[cells[point]]
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class _BoardView:
+    """
+    A live view of a game's board as a list of rows, kept so that the board
+    can still be read and edited as board[row][col].
+    """
+    __slots__ = ('_game',)
+
+    def __init__(self, game):
+        self._game = game
+
+    def __len__(self):
+        return self._game.board_size
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return list(self)[row]
+        size = self._game.board_size
+        if row < 0:
+            row += size
+        if not 0 <= row < size:
+            raise IndexError('board row out of range')
+        return _BoardRow(self._game, row)
+
+    def __iter__(self):
+        for row in range(self._game.board_size):
+            yield _BoardRow(self._game, row)
+
+    def __eq__(self, other):
+        return [list(row) for row in self] == [list(row) for row in other]
+
+    def __repr__(self):
+        return repr([list(row) for row in self])
+
+
 class GoGame:
-    def __init__(self, board_size=6):
+    def __init__(self, board_size=6, superko=False):
         self.board_size = board_size
-        self.board = [[' ' for _ in range(self.board_size)] for _ in range(self.board_size)]
+        self.superko = superko
+        self._tables = _board_tables(board_size)
+        self._cells = self._tables.empty_cells[:]
         self.current_player = 'B'
         self.opposing_player = 'W'
         self.moves = []
@@ -11,6 +153,241 @@ class GoGame:
         self.w_captures = 0
         self.is_over = False
 
+        # Chain tracking: every stone maps to the head point of its chain,
+        # and every head maps to the chain's stones and liberties
+        self._chain_of = [-1] * self._tables.area
+        self._chain_stones = {}
+        self._chain_libs = {}
+        self._chains_dirty = False
+
+        # One record per move played, holding what undo_move needs to take it back, the mover included
+        # since the player to move may be changed between moves
+        self._undo = []
+
+        # Zobrist hash of the stones on the board, and of every position seen when playing with superko
+        self._stone_hash = 0
+        self._seen_hashes = {0} if superko else None
+
+        # Scratch buffer and stack of the board analyses, the buffer is created on first use and never copied
+        self._scratch = None
+        self._scratch_stack = []
+
+    @property
+    def position_hash(self):
+        """
+        The 64-bit Zobrist hash of the position, covering the stones and the player to move.
+        """
+        if self._chains_dirty:
+            self._rebuild_chains()
+        if self.current_player == 'W':
+            return self._stone_hash ^ self._tables.zobrist_to_move
+        return self._stone_hash
+
+    @property
+    def board(self):
+        return _BoardView(self)
+
+    @board.setter
+    def board(self, rows):
+        cells = self._tables.empty_cells[:]
+        for row, values in enumerate(rows):
+            start = (row + 1) * self._tables.width + 1
+            for col, value in enumerate(values):
+                cells[start + col] = _STONES[value]
+        self._cells = cells
+        self._chains_dirty = True
+
+    def _rebuild_chains(self):
+        """
+        Rebuilds the chain tracking from scratch by scanning the whole board.
+        Every stone is mapped to the head point of its chain, and every chain head
+        is mapped to the list of its stones and the set of its liberties.
+        """
+        cells = self._cells
+        self._chain_of = [-1] * self._tables.area
+        self._chain_stones = {}
+        self._chain_libs = {}
+
+        self._stone_hash = 0
+        for point in self._tables.points:
+            if cells[point] != EMPTY:
+                self._stone_hash ^= self._tables.zobrist[cells[point]][point]
+                if self._chain_of[point] == -1:
+                    self._build_chain(point)
+
+        # A position set up directly on the board starts a new history
+        if self.superko:
+            self._seen_hashes = {self._stone_hash}
+        self._chains_dirty = False
+
+    def _build_chain(self, point):
+        """
+        Flood fills the chain containing the stone on the given point and records it with
+        the point as its head. The chain's stones must not belong to any tracked chain.
+        """
+        cells = self._cells
+        chain_of = self._chain_of
+        neighbors = self._tables.neighbors
+        player = cells[point]
+
+        stones = [point]
+        liberties = set()
+        chain_of[point] = point
+        index = 0
+        while index < len(stones):
+            for neighbor in neighbors[stones[index]]:
+                value = cells[neighbor]
+                if value == EMPTY:
+                    liberties.add(neighbor)
+                elif value == player and chain_of[neighbor] == -1:
+                    chain_of[neighbor] = point
+                    stones.append(neighbor)
+            index += 1
+
+        self._chain_stones[point] = stones
+        self._chain_libs[point] = liberties
+
+    def _check_move(self, point, player):
+        """
+        Checks whether placing a stone for the given player on an empty point is legal,
+        using only the chains next to the point.
+
+        Parameters:
+        point (int): The index of the point in the flat board.
+        player (int): BLACK or WHITE.
+
+        Returns:
+        str or None: 'suicide', 'ko' or 'superko' if the move is illegal, None otherwise.
+        """
+        cells = self._cells
+        opponent = 3 - player
+        has_liberty = False
+        captured_count = 0
+        captured_stone = None
+        counted = []
+
+        for neighbor in self._tables.neighbors[point]:
+            value = cells[neighbor]
+            if value == EMPTY:
+                has_liberty = True
+            elif value == player:
+                if len(self._chain_libs[self._chain_of[neighbor]]) > 1:
+                    has_liberty = True
+            elif value == opponent:
+                head = self._chain_of[neighbor]
+                if head not in counted and len(self._chain_libs[head]) == 1:
+                    counted.append(head)
+                    captured_count += len(self._chain_stones[head])
+                    captured_stone = neighbor
+
+        if captured_count:
+            has_liberty = True
+        if not has_liberty:
+            return 'suicide'
+
+        # The ko point is the point of the single stone captured by the previous move,
+        # a single-stone capture next to it would retake the ko.
+        if self.potential_ko and captured_count == 1:
+            row, col = self._tables.coords[captured_stone]
+            if self.is_adjacent(row, col, self.potential_ko[0], self.potential_ko[1]):
+                return 'ko'
+
+        if self.superko:
+            zobrist = self._tables.zobrist
+            new_hash = self._stone_hash ^ zobrist[player][point]
+            for head in counted:
+                for stone in self._chain_stones[head]:
+                    new_hash ^= zobrist[opponent][stone]
+            if new_hash in self._seen_hashes:
+                return 'superko'
+        return None
+
+    def _place_stone(self, point, player):
+        """
+        Places a stone on an empty point and updates the chains next to it,
+        merging friendly chains and removing enemy chains left without liberties.
+        The move is expected to have been checked with _check_move beforehand.
+
+        Parameters:
+        point (int): The index of the point in the flat board.
+        player (int): BLACK or WHITE.
+
+        Returns:
+        list: The points of the stones captured by the move.
+        """
+        cells = self._cells
+        chain_of = self._chain_of
+        opponent = 3 - player
+        cells[point] = player
+        self._stone_hash ^= self._tables.zobrist[player][point]
+
+        liberties = set()
+        friendly = []
+        enemies = []
+        for neighbor in self._tables.neighbors[point]:
+            value = cells[neighbor]
+            if value == EMPTY:
+                liberties.add(neighbor)
+            elif value == player:
+                if chain_of[neighbor] not in friendly:
+                    friendly.append(chain_of[neighbor])
+            elif value == opponent:
+                if chain_of[neighbor] not in enemies:
+                    enemies.append(chain_of[neighbor])
+
+        # Merge into the largest friendly chain so that the fewest stones are relabelled
+        head = point
+        stones = [point]
+        if friendly:
+            head = max(friendly, key=lambda h: len(self._chain_stones[h]))
+            stones = self._chain_stones[head]
+            stones.append(point)
+            liberties |= self._chain_libs[head]
+            for other in friendly:
+                if other != head:
+                    other_stones = self._chain_stones.pop(other)
+                    for stone in other_stones:
+                        chain_of[stone] = head
+                    stones.extend(other_stones)
+                    liberties |= self._chain_libs.pop(other)
+        liberties.discard(point)
+        chain_of[point] = head
+        self._chain_stones[head] = stones
+        self._chain_libs[head] = liberties
+
+        captured = []
+        for enemy in enemies:
+            enemy_libs = self._chain_libs[enemy]
+            enemy_libs.discard(point)
+            if not enemy_libs:
+                captured.extend(self._remove_chain(enemy))
+        return captured
+
+    def _remove_chain(self, head):
+        """
+        Removes a chain from the board, giving its points back as liberties to the neighbouring chains.
+
+        Returns:
+        list: The points of the removed stones.
+        """
+        cells = self._cells
+        chain_of = self._chain_of
+        neighbors = self._tables.neighbors
+        keys = self._tables.zobrist[cells[head]]
+        stones = self._chain_stones.pop(head)
+        del self._chain_libs[head]
+
+        for stone in stones:
+            self._stone_hash ^= keys[stone]
+            cells[stone] = EMPTY
+            chain_of[stone] = -1
+        for stone in stones:
+            for neighbor in neighbors[stone]:
+                other = chain_of[neighbor]
+                if other != -1:
+                    self._chain_libs[other].add(stone)
+        return stones
+
     def find_groups(self):
         """
         Identifies and returns all groups of stones on the board. 
@@ -22,41 +399,27 @@ class GoGame:
         Each dictionary contains keys 'player', 'stones', and a binary 'captured' flag.
         """
         groups = []
-        visited = [[False for _ in range(self.board_size)] for _ in range(self.board_size)]
-
-        def is_valid(row, col, player):
-            return 0 <= row < self.board_size and 0 <= col < self.board_size and self.board[row][col] == player
-
-        def flood_fill(row, col, group):
-            directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-            visited[row][col] = True
-            group.append((row, col))
-
-            for dx, dy in directions:
-                new_row, new_col = row + dx, col + dy
-                if is_valid(new_row, new_col, self.board[row][col]) and not visited[new_row][new_col]:
-                    flood_fill(new_row, new_col, group)
+        cells = self._cells
+        neighbors = self._tables.neighbors
+        coords = self._tables.coords
+        marks = self._scratch_buffer(self._tables.zeros)
+
+        for point in self._tables.points:
+            player = cells[point]
+            if player != EMPTY and not marks[point]:
+                group = self._flood_fill(point, player, marks)
+
+                # Check if the group has any liberties
+                captured = True
+                for stone in group:
+                    for neighbor in neighbors[stone]:
+                        if cells[neighbor] == EMPTY:
+                            captured = False
+                            break
+                    if not captured:
+                        break
 
-        for i in range(self.board_size):
-            for j in range(self.board_size):
-                if self.board[i][j] != ' ' and not visited[i][j]:
-                    player = self.board[i][j]
-                    group = []
-                    flood_fill(i, j, group)
-
-                    # Check if the group has any liberties
-                    captured = True
-                    for stone in group:
-                        row, col = stone
-                        for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                            new_row, new_col = row + dx, col + dy
-                            if (0 <= new_row < self.board_size and
-                                    0 <= new_col < self.board_size and
-                                    self.board[new_row][new_col] == ' '):
-                                captured = False
-                                break
-
-                    groups.append({'player': player, 'stones': group, 'captured': captured})
+                groups.append({'player': _SYMBOLS[player], 'stones': [coords[stone] for stone in group], 'captured': captured})
 
         return groups
     
@@ -72,60 +435,74 @@ class GoGame:
         and the player who has surrounded the group.
         """
         captured_empty_groups = []
-        visited_empty = [[False for _ in range(self.board_size)] for _ in range(self.board_size)]
-
-        def is_valid(row, col):
-            return 0 <= row < self.board_size and 0 <= col < self.board_size
+        cells = self._cells
+        neighbors = self._tables.neighbors
+        coords = self._tables.coords
+        marks = self._scratch_buffer(self._tables.zeros)
+
+        for point in self._tables.points:
+            if cells[point] == EMPTY and not marks[point]:
+                group = self._flood_fill(point, EMPTY, marks)
+
+                black_neighbor = False
+                white_neighbor = False
+                for stone in group:
+                    for neighbor in neighbors[stone]:
+                        if cells[neighbor] == BLACK:
+                            black_neighbor = True
+                        elif cells[neighbor] == WHITE:
+                            white_neighbor = True
+                    if black_neighbor and white_neighbor:
+                        break
+
+                if black_neighbor != white_neighbor:
+                    capturing_player = 'B' if black_neighbor else 'W'
+                    captured_empty_groups.append({'stones': [coords[stone] for stone in group], 'capturing_player': capturing_player})
 
-        def flood_fill(row, col, group):
-            directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-            visited_empty[row][col] = True
-            group.append((row, col))
+        return captured_empty_groups
 
-            for dx, dy in directions:
-                new_row, new_col = row + dx, col + dy
-                if is_valid(new_row, new_col) and not visited_empty[new_row][new_col] and self.board[new_row][new_col] == ' ':
-                    flood_fill(new_row, new_col, group)
+    def _scratch_buffer(self, source):
+        """
+        Returns the game's scratch buffer of one byte per cell, filled with a copy of source
+        and created on first use.
+        """
+        scratch = self._scratch
+        if scratch is None:
+            scratch = self._scratch = bytearray(source)
+        else:
+            scratch[:] = source
+        return scratch
 
-        for i in range(self.board_size):
-            for j in range(self.board_size):
-                if not visited_empty[i][j] and self.board[i][j] == ' ':
-                    group = []
-                    flood_fill(i, j, group)
-                    captured = False
-                    capturing_player = None
-
-                    black_neighbor = False
-                    white_neighbor = False
-
-                    for stone in group:
-                        row, col = stone
-                        for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                            new_row, new_col = row + dx, col + dy
-                            if is_valid(new_row, new_col):
-                                if self.board[new_row][new_col] == 'B':
-                                    black_neighbor = True
-                                    if white_neighbor:
-                                        captured = False
-                                        break
-                                elif self.board[new_row][new_col] == 'W':
-                                    white_neighbor = True
-                                    if black_neighbor:
-                                        captured = False
-                                        break
-                    
-                    if not captured:
-                        if black_neighbor and not white_neighbor:
-                            captured = True
-                            capturing_player = 'B'
-                        elif white_neighbor and not black_neighbor:
-                            captured = True
-                            capturing_player = 'W'
+    def _flood_fill(self, start, value, marks):
+        """
+        Collects the cells holding the given value that are connected to start, in the order a recursive
+        depth-first flood fill visits them. The recursion is replaced by a stack holding, for every cell
+        on the current path, an iterator over the neighbours it has left to look at.
 
-                    if captured:
-                        captured_empty_groups.append({'stones': group, 'capturing_player': capturing_player})
+        Parameters:
+        start (int): The cell to start from.
+        value (int): EMPTY, BLACK or WHITE.
+        marks (bytearray): Nonzero for the cells already visited, updated in place.
 
-        return captured_empty_groups
+        Returns:
+        list: The connected cells.
+        """
+        cells = self._cells
+        neighbors = self._tables.neighbors
+        stack = self._scratch_stack
+        group = [start]
+        marks[start] = 1
+        stack.append(iter(neighbors[start]))
+        while stack:
+            for neighbor in stack[-1]:
+                if cells[neighbor] == value and not marks[neighbor]:
+                    marks[neighbor] = 1
+                    group.append(neighbor)
+                    stack.append(iter(neighbors[neighbor]))
+                    break
+            else:
+                stack.pop()
+        return group
 
     def count_territory(self):
         """
@@ -154,14 +531,58 @@ class GoGame:
         dict: A dictionary with keys 'B' and 'W', and values representing the territory count for each player.
         """
         score = self.count_territory()
-        score['B'] += self.b_captures
-        score['W'] += self.w_captures
-        if score['W'] > score['B']:
-            return {'winner': 'W', 'W Score': score['W'], 'B Score' : score['B']}
-        elif score['W'] < score['B']:
-            return {'winner': 'B', 'W Score': score['W'], 'B Score' : score['B']}
+        return self._score_result(score['B'] + self.b_captures, score['W'] + self.w_captures)
+
+    def fast_score(self):
+        """
+        Scores the game like calculate_score, in a single pass over the empty regions of the board
+        that only counts their points, without building the territory groups.
+        The flood fill runs on a scratch copy of the board kept by the game, so it allocates nothing.
+
+        Returns:
+        dict: The same result as calculate_score, with keys 'winner', 'W Score' and 'B Score'.
+        """
+        scratch = self._scratch_buffer(self._cells)
+        neighbors = self._tables.neighbors
+        stack = self._scratch_stack
+
+        b_territory = 0
+        w_territory = 0
+        for point in self._tables.points:
+            if scratch[point] != EMPTY:
+                continue
+            # Visited empty points are marked as border, which the bordering check skips
+            scratch[point] = BORDER
+            stack.append(point)
+            size = 0
+            bordered = 0
+            while stack:
+                size += 1
+                for neighbor in neighbors[stack.pop()]:
+                    value = scratch[neighbor]
+                    if value == EMPTY:
+                        scratch[neighbor] = BORDER
+                        stack.append(neighbor)
+                    elif value != BORDER:
+                        bordered |= value
+            if bordered == BLACK:
+                b_territory += size
+            elif bordered == WHITE:
+                w_territory += size
+
+        return self._score_result(b_territory + self.b_captures, w_territory + self.w_captures)
+
+    @staticmethod
+    def _score_result(b_score, w_score):
+        """
+        Builds the result dictionary of calculate_score from the final scores.
+        """
+        if w_score > b_score:
+            return {'winner': 'W', 'W Score': w_score, 'B Score' : b_score}
+        elif w_score < b_score:
+            return {'winner': 'B', 'W Score': w_score, 'B Score' : b_score}
         else:
-            return {'winner': 'Tie', 'W Score': score['W'], 'B Score' : score['B']}
+            return {'winner': 'Tie', 'W Score': w_score, 'B Score' : b_score}
 
     def print_board(self):
         print("   ", end="")
@@ -171,11 +592,12 @@ class GoGame:
 
         for i in range(self.board_size):
             print(f"{i:2}", end=" ")
-            for j in range(self.board_size):
-                piece = self.board[i][j]
-                if piece == 'B':
+            start = (i + 1) * self._tables.width + 1
+            for point in range(start, start + self.board_size):
+                piece = self._cells[point]
+                if piece == BLACK:
                     print("\u25CB ", end="")  # Unicode for black circle
-                elif piece == 'W':
+                elif piece == WHITE:
                     print("\u25CF ", end="")  # Unicode for white circle
                 else:
                     print("\u00B7 ", end="")  # Unicode for middle dot
@@ -199,8 +621,10 @@ class GoGame:
         """
         Saves the current state of the board and other instance variables.
         """
+        if self._chains_dirty:
+            self._rebuild_chains()
         state = {
-            'board': [row[:] for row in self.board],
+            'cells': self._cells[:],
             'board_size': self.board_size,
             'current_player': self.current_player,
             'opposing_player': self.opposing_player,
@@ -208,7 +632,13 @@ class GoGame:
             'potential_ko': self.potential_ko,
             'b_captures': self.b_captures,
             'w_captures': self.w_captures,
-            'pass_counter': self.pass_counter
+            'pass_counter': self.pass_counter,
+            'undo': self._undo[:],
+            'stone_hash': self._stone_hash,
+            'seen_hashes': set(self._seen_hashes) if self.superko else None,
+            'chain_of': self._chain_of[:],
+            'chain_stones': {head: stones[:] for head, stones in self._chain_stones.items()},
+            'chain_libs': {head: set(libs) for head, libs in self._chain_libs.items()}
         }
         return state
 
@@ -216,7 +646,8 @@ class GoGame:
         """
         Restores the board and other instance variables to a previously saved state.
         """
-        self.board = [row[:] for row in saved_state['board']]
+        self._cells = saved_state['cells'][:]
+        self._chains_dirty = True
         self.board_size = saved_state['board_size']
         self.current_player = saved_state['current_player']
         self.opposing_player = saved_state['opposing_player']
@@ -225,6 +656,15 @@ class GoGame:
         self.b_captures = saved_state['b_captures']
         self.w_captures = saved_state['w_captures']
         self.pass_counter = saved_state['pass_counter']
+        self._undo = saved_state['undo'][:]
+        self._stone_hash = saved_state['stone_hash']
+        if self.superko:
+            self._seen_hashes = set(saved_state['seen_hashes'])
+        if 'chain_of' in saved_state:
+            self._chain_of = saved_state['chain_of'][:]
+            self._chain_stones = {head: stones[:] for head, stones in saved_state['chain_stones'].items()}
+            self._chain_libs = {head: set(libs) for head, libs in saved_state['chain_libs'].items()}
+            self._chains_dirty = False
 
     def make_move(self, row, col=0, live=False):
         """
@@ -233,6 +673,7 @@ class GoGame:
         If the game is over, no more moves can be played. 
         If a player passes, the potential Ko is reset, the pass counter is incremented, 
         and the players are switched. If there have been 4 passes in a row, the game is over.
+        Captures, self-capture and ko are decided from the chains next to the move only.
 
         Parameters:
         row (int or "pass"): The row to place the stone, or "pass" to pass the turn.
@@ -248,6 +689,8 @@ class GoGame:
             return False
 
         if row == "pass":  # Handling the pass move
+            self._undo.append((None, None, self.potential_ko, self.b_captures, self.w_captures, self.pass_counter,
+                               _STONES[self.current_player]))
             self.potential_ko = None
             self.pass_counter += 1
             self.current_player = 'W' if self.current_player == 'B' else 'B'
@@ -259,71 +702,199 @@ class GoGame:
                     print(self.calculate_score())
             return True
 
-
-        saved_state = self.save_state()
-
         if row < 0 or row >= self.board_size or col < 0 or col >= self.board_size:
             if live:
                 print("Invalid move. Out of bounds.")
             return False
 
-        if self.board[row][col] != ' ':
+        point = (row + 1) * self._tables.width + col + 1
+        if self._cells[point] != EMPTY:
             if live:
                 print("Invalid move. Cell is already occupied.")
             return False
 
-        self.board[row][col] = self.current_player
-        self.moves.append((row, col, self.current_player))
-        groups = self.find_groups()
-
-        captured_enemies = []
-
-        # Check for captures of enemy pieces
-        for group in groups:
-            if group["captured"] and group["player"] is not self.current_player:
-                for stone in group["stones"]:
-                    row, col = stone
-                    captured_enemies.append(stone)
-                    self.board[row][col] = ' '
-                    if self.current_player == 'B':
-                        self.b_captures += 1
-                    else:
-                        self.w_captures += 1
-                
-        groups = self.find_groups()
-
-         # Check for self-capture
-        self_captured = False
-        for group in groups:
-            if group["captured"] and group["player"] == self.current_player:
-                self_captured = True
-                break
-
-        # Undo captures and moves if self-capture occurs
-        if self_captured:
-            self.board[row][col] = ' '  # Undo the move
+        if self._chains_dirty:
+            self._rebuild_chains()
+
+        player = _STONES[self.current_player]
+        violation = self._check_move(point, player)
+        if violation == 'suicide':
             if live:
                 print("Invalid move. Self-capture is not allowed, try again.")
-            self.restore_state(saved_state)
             return False
-        
-        if self.potential_ko and len(captured_enemies) == 1:
-            if self.is_adjacent(row, col, self.potential_ko[0], self.potential_ko[1]):
-                if live:
-                    print("Invalid move. Violates ko, try again.")
-                self.restore_state(saved_state)
-                return False
-            
+        if violation == 'ko':
+            if live:
+                print("Invalid move. Violates ko, try again.")
+            return False
+        if violation == 'superko':
+            if live:
+                print("Invalid move. Repeats an earlier position, try again.")
+            return False
+
+        self._commit_stone(point, player)
+        return True
+
+    def _commit_stone(self, point, player):
+        """
+        Plays a stone for the player to move on a point already checked with _check_move,
+        updating the captures, the ko point, the history and the player to move.
+
+        Parameters:
+        point (int): The index of the point in the flat board.
+        player (int): BLACK or WHITE, matching the player to move.
+
+        Returns:
+        list: The points of the stones captured by the move.
+        """
+        row, col = self._tables.coords[point]
+        self.moves.append((row, col, self.current_player))
+        captured_enemies = self._place_stone(point, player)
+        self._undo.append((point, captured_enemies, self.potential_ko, self.b_captures, self.w_captures, self.pass_counter,
+                           player))
+        if self.superko:
+            self._seen_hashes.add(self._stone_hash)
+        if player == BLACK:
+            self.b_captures += len(captured_enemies)
+        else:
+            self.w_captures += len(captured_enemies)
+
         if len(captured_enemies) == 1:
-            self.potential_ko = [row, col]
+            self.potential_ko = list(self._tables.coords[captured_enemies[0]])
         else:
             self.potential_ko = None
 
         self.current_player = 'W' if self.current_player == 'B' else 'B'
         self.opposing_player = 'B' if self.opposing_player == 'W' else 'W'
         self.pass_counter = 0
+        return captured_enemies
+
+    def undo_move(self):
+        """
+        Takes back the last move made with make_move, restoring the placed stone's point,
+        the captured stones, the ko point, the capture counters, the pass counter and the player who moved.
+        Only what the move changed is touched, so no snapshot of the board is needed.
+
+        Returns:
+        bool: True if a move was taken back, False if there was nothing to undo.
+        """
+        if not self._undo:
+            return False
+        point, captured, potential_ko, b_captures, w_captures, pass_counter, player = self._undo.pop()
+
+        if player == BLACK:
+            self.current_player, self.opposing_player = 'B', 'W'
+        else:
+            self.current_player, self.opposing_player = 'W', 'B'
+        self.potential_ko = potential_ko
+        self.b_captures = b_captures
+        self.w_captures = w_captures
+        self.pass_counter = pass_counter
+        self.is_over = False
+        if point is None:
+            return True
+
+        self.moves.pop()
+        cells = self._cells
+        opponent = _STONES[self.opposing_player]
+        if self._chains_dirty:
+            cells[point] = EMPTY
+            for stone in captured:
+                cells[stone] = opponent
+            return True
+
+        if self.superko:
+            self._seen_hashes.discard(self._stone_hash)
+        zobrist = self._tables.zobrist
+        self._stone_hash ^= zobrist[player][point]
+        for stone in captured:
+            self._stone_hash ^= zobrist[opponent][stone]
+
+        # Drop the chain the move joined, it is split again by rebuilding from its other stones
+        chain_of = self._chain_of
+        neighbors = self._tables.neighbors
+        head = chain_of[point]
+        stones = self._chain_stones.pop(head)
+        del self._chain_libs[head]
+        for stone in stones:
+            chain_of[stone] = -1
+
+        cells[point] = EMPTY
+        for stone in captured:
+            cells[stone] = opponent
+        for stone in stones + captured:
+            if cells[stone] != EMPTY and chain_of[stone] == -1:
+                self._build_chain(stone)
+
+        # Chains next to the restored stones lose those liberties, chains next to the move regain it
+        for stone in captured:
+            for neighbor in neighbors[stone]:
+                if chain_of[neighbor] != -1:
+                    self._chain_libs[chain_of[neighbor]].discard(stone)
+        for neighbor in neighbors[point]:
+            if chain_of[neighbor] != -1:
+                self._chain_libs[chain_of[neighbor]].add(point)
         return True
 
+    def is_legal(self, row, col=0):
+        """
+        Checks whether the player to move may play at the given point, without playing the move.
+        The answer comes from the point's neighbours only: an empty neighbour, a friendly chain
+        with more than one liberty, or an enemy chain in atari that the move captures, plus the ko point.
+
+        Parameters:
+        row (int or "pass"): The row of the move, or "pass".
+        col (int, optional): The column of the move. Defaults to 0.
+
+        Returns:
+        bool: True if make_move would accept the move, False otherwise.
+        """
+        if self.is_over:
+            return False
+        if row == "pass":
+            return True
+        if row < 0 or row >= self.board_size or col < 0 or col >= self.board_size:
+            return False
+
+        point = (row + 1) * self._tables.width + col + 1
+        if self._cells[point] != EMPTY:
+            return False
+        if self._chains_dirty:
+            self._rebuild_chains()
+        return self._check_move(point, _STONES[self.current_player]) is None
+
+    def legal_moves(self):
+        """
+        Generates the points the player to move may play on, in row-major order.
+        Passing is always legal while the game is running and is not included.
+
+        Yields:
+        tuple: The row and the column of each legal move.
+        """
+        if self.is_over:
+            return
+        if self._chains_dirty:
+            self._rebuild_chains()
+
+        cells = self._cells
+        coords = self._tables.coords
+        player = _STONES[self.current_player]
+        for point in self._tables.points:
+            if cells[point] == EMPTY and self._check_move(point, player) is None:
+                yield coords[point]
+
+    def legal_move_mask(self):
+        """
+        Returns the legal moves of the player to move as a bitmask,
+        where bit (row * board_size + col) is set when the point may be played.
+
+        Returns:
+        int: The bitmask of legal moves.
+        """
+        mask = 0
+        for row, col in self.legal_moves():
+            mask |= 1 << (row * self.board_size + col)
+        return mask
+
     def get_valid_moves(self):
         """
         Get a list of valid moves for the current state of the board.
@@ -336,19 +907,9 @@ class GoGame:
         A pass is represented as ("pass", 0).
         """
         valid_moves = []
-        saved_state = self.save_state()
         if self.pass_counter < 4:
             valid_moves.append(("pass", 0))
-
-        for row in range(self.board_size):
-            for col in range(self.board_size):
-                if self.board[row][col] == ' ':
-                    # Try making the move and check if it's valid
-                    if self.make_move(row, col, False):
-                        valid_moves.append((row, col))
-                    # Restore the state for next iteration
-                    self.restore_state(saved_state)
-
+        valid_moves.extend(self.legal_moves())
         return valid_moves
     
     def clone(self):
@@ -358,12 +919,22 @@ class GoGame:
         Returns:
         GoGame: A new instance of the GoGame class with the same state as the current instance.
         """
-        cloned_game = GoGame(self.board_size)
-
-        cloned_game.board = [row[:] for row in self.board]
+        cloned_game = GoGame(self.board_size, self.superko)
+
+        cloned_game._cells = self._cells[:]
+        cloned_game._chains_dirty = self._chains_dirty
+        if not self._chains_dirty:
+            cloned_game._chain_of = self._chain_of[:]
+            cloned_game._chain_stones = {head: stones[:] for head, stones in self._chain_stones.items()}
+            cloned_game._chain_libs = {head: set(libs) for head, libs in self._chain_libs.items()}
+            cloned_game._chains_dirty = False
         cloned_game.current_player = self.current_player
         cloned_game.opposing_player = self.opposing_player
         cloned_game.moves = self.moves[:]
+        cloned_game._undo = self._undo[:]
+        cloned_game._stone_hash = self._stone_hash
+        if self.superko:
+            cloned_game._seen_hashes = set(self._seen_hashes)
         cloned_game.potential_ko = self.potential_ko
         cloned_game.pass_counter = self.pass_counter
         cloned_game.b_captures = self.b_captures
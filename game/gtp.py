@@ -0,0 +1,400 @@
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .book import OpeningBook
+from .go_game import GoGame
+from .mct import MonteCarloTree
+
+# GTP column letters, I is skipped
+_COLUMNS = 'ABCDEFGHJKLMNOPQRSTUVWXYZ'
+
+
+class GTPError(Exception):
+    """
+    A command failed, the message is sent back as the GTP error response.
+    """
+
+
+class GTPEngine:
+    """
+    A Go Text Protocol front-end for GoGame and MonteCarloTree, for tournament managers and GUIs.
+    Commands are read on an asyncio loop while searches run in an executor thread, so commands keep
+    being read during a genmove. An 'interrupt' command arriving during a search stops it, as does the
+    '# interrupt' comment line GoGui sends to engines listing gogui-interrupt, and genmove answers with
+    the best move found so far. Other commands, quit included, wait for the search. Responses are always
+    sent in command order.
+
+    A book passed in the options is played from before searching, as by MonteCarloTree.best_move.
+    Move times come from time_settings and time_left when the controller sends them, otherwise
+    every search runs its iterations, within move_time seconds if given.
+    """
+    name = 'GoBot'
+    version = '1.0'
+
+    def __init__(self, board_size=9, iterations=1000, move_time=None, margin=0.1, chunk=20, **options):
+        """
+        Parameters:
+        board_size (int, optional): The initial size of the board. Defaults to 9.
+        iterations (int, optional): The most iterations of every search. Defaults to 1000.
+        move_time (float, optional): The most seconds of every search. Defaults to None, no limit
+        other than the clock.
+        margin (float, optional): The seconds kept back from every move's time for the overhead
+        of answering. Defaults to 0.1.
+        chunk (int, optional): The iterations searched between checks for an interrupt. Defaults to 20.
+        options: The keyword arguments of MonteCarloTree, such as policy or rave.
+        """
+        self.iterations = iterations
+        self.move_time = move_time
+        self.margin = margin
+        self.chunk = chunk
+        self.options = options
+        self.komi = 0.0
+        # Main time, byo-yomi period time and stones per period, from time_settings
+        self.time_settings = None
+        # Seconds and stones left for each color, from time_left
+        self.time_left = {}
+        self.running = True
+        # Sequence numbers of the command lines: the command being run, and the last interrupt read.
+        # A search stops once an interrupt is read after its genmove.
+        self._command_line = 0
+        self._interrupt_line = 0
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self.commands = {
+            'protocol_version': self.cmd_protocol_version,
+            'name': self.cmd_name,
+            'version': self.cmd_version,
+            'known_command': self.cmd_known_command,
+            'list_commands': self.cmd_list_commands,
+            'quit': self.cmd_quit,
+            'boardsize': self.cmd_boardsize,
+            'clear_board': self.cmd_clear_board,
+            'komi': self.cmd_komi,
+            'play': self.cmd_play,
+            'genmove': self.cmd_genmove,
+            'undo': self.cmd_undo,
+            'showboard': self.cmd_showboard,
+            'final_score': self.cmd_final_score,
+            'time_settings': self.cmd_time_settings,
+            'time_left': self.cmd_time_left,
+            'interrupt': self.cmd_interrupt,
+            'gogui-interrupt': self.cmd_interrupt,
+        }
+        self.reset(board_size)
+
+    def reset(self, board_size):
+        self.game = GoGame(board_size)
+        self.tree = None
+
+    def parse_color(self, text):
+        color = text.lower()
+        if color in ('b', 'black'):
+            return 'B'
+        if color in ('w', 'white'):
+            return 'W'
+        raise GTPError("invalid color")
+
+    def parse_vertex(self, text):
+        """
+        Converts a GTP vertex, such as D4 or pass, into a move, (row, col) or ("pass", 0).
+        Row numbers count from the bottom of the board, rows of the game from the top.
+        """
+        text = text.upper()
+        if text == 'PASS':
+            return ("pass", 0)
+        size = self.game.board_size
+        try:
+            col = _COLUMNS.index(text[0])
+            row = size - int(text[1:])
+        except (IndexError, ValueError):
+            raise GTPError("invalid vertex")
+        if not (0 <= row < size and 0 <= col < size):
+            raise GTPError("invalid vertex")
+        return (row, col)
+
+    def format_vertex(self, move):
+        if move[0] == "pass":
+            return 'pass'
+        row, col = move
+        return f'{_COLUMNS[col]}{self.game.board_size - row}'
+
+    def set_player(self, color):
+        """
+        Lets the given color move next, for controllers that play several moves of one color in a row.
+        Every move keeps its mover in the game's undo record, so undo takes such moves back by their own color.
+        """
+        if self.game.current_player != color:
+            self.game.current_player, self.game.opposing_player = color, self.game.current_player
+            self.tree = None
+
+    def play(self, move):
+        """
+        Plays a move on the game and advances the search tree past it.
+        """
+        if not self.game.make_move(*move):
+            raise GTPError("illegal move")
+        if self.tree is not None:
+            self.tree.advance(move)
+
+    def move_budget(self, color):
+        """
+        Returns the seconds the next search of the given color may take, or None without any limit.
+        With byo-yomi stones left, the period is shared by its stones, otherwise the main time left
+        is spread over the moves expected to remain, about half the empty points.
+        """
+        budgets = []
+        if self.move_time is not None:
+            budgets.append(self.move_time)
+        if color in self.time_left:
+            seconds, stones = self.time_left[color]
+            if stones > 0:
+                budgets.append(seconds / stones)
+            else:
+                empty = sum(cell == ' ' for row in self.game.board for cell in row)
+                budgets.append(seconds / max(10, empty // 2))
+        elif self.time_settings is not None:
+            main_time, byo_yomi_time, byo_yomi_stones = self.time_settings
+            if main_time > 0:
+                budgets.append(main_time / max(10, self.game.board_size ** 2 // 2))
+            elif byo_yomi_stones > 0:
+                budgets.append(byo_yomi_time / byo_yomi_stones)
+        if not budgets:
+            return None
+        return max(0.0, min(budgets) - self.margin)
+
+    def search(self, tree, iterations, deadline):
+        """
+        Searches in chunks until the iterations are spent, the deadline passes or an interrupt arrives.
+        Runs in the executor thread.
+
+        Returns:
+        tuple: The best move found, as (row, col) or ("pass", 0).
+        """
+        search_line = self._command_line
+        count = 0
+        while True:
+            count += tree.search(min(self.chunk, iterations - count), deadline)
+            if self._interrupt_line > search_line or count >= iterations:
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+        return tree.decode_action(tree.get_best_child(tree.root).move)
+
+    def cmd_protocol_version(self, args):
+        return '2'
+
+    def cmd_name(self, args):
+        return self.name
+
+    def cmd_version(self, args):
+        return self.version
+
+    def cmd_known_command(self, args):
+        return 'true' if args and args[0] in self.commands else 'false'
+
+    def cmd_list_commands(self, args):
+        return '\n'.join(self.commands)
+
+    def cmd_quit(self, args):
+        self.running = False
+        return ''
+
+    def cmd_boardsize(self, args):
+        try:
+            size = int(args[0])
+        except (IndexError, ValueError):
+            raise GTPError("boardsize not an integer")
+        if not 2 <= size <= len(_COLUMNS):
+            raise GTPError("unacceptable size")
+        self.reset(size)
+        return ''
+
+    def cmd_clear_board(self, args):
+        self.reset(self.game.board_size)
+        return ''
+
+    def cmd_komi(self, args):
+        # Kept for the controller, the scoring of GoGame has no komi
+        try:
+            self.komi = float(args[0])
+        except (IndexError, ValueError):
+            raise GTPError("komi not a float")
+        return ''
+
+    def cmd_play(self, args):
+        if len(args) < 2:
+            raise GTPError("invalid color or coordinate")
+        color = self.parse_color(args[0])
+        move = self.parse_vertex(args[1])
+        player, tree = self.game.current_player, self.tree
+        self.set_player(color)
+        try:
+            self.play(move)
+        except GTPError:
+            # A failed command leaves the player to move and the tree as they were
+            self.set_player(player)
+            self.tree = tree
+            raise
+        return ''
+
+    async def cmd_genmove(self, args):
+        if not args:
+            raise GTPError("invalid color")
+        color = self.parse_color(args[0])
+        self.set_player(color)
+        if self.game.is_over:
+            return 'pass'
+        if self.tree is None or self.tree.player != color:
+            self.tree = MonteCarloTree(self.game, **self.options)
+
+        move = self.tree.book_move()
+        if move is not None:
+            self.play(move)
+            return self.format_vertex(move)
+
+        budget = self.move_budget(color)
+        deadline = time.monotonic() + budget if budget is not None else None
+        loop = asyncio.get_running_loop()
+        move = await loop.run_in_executor(self._executor, self.search, self.tree, self.iterations, deadline)
+        self.play(move)
+        return self.format_vertex(move)
+
+    def cmd_undo(self, args):
+        if not self.game.undo_move():
+            raise GTPError("cannot undo")
+        self.tree = None
+        return ''
+
+    def cmd_showboard(self, args):
+        size = self.game.board_size
+        lines = ['   ' + ' '.join(_COLUMNS[:size])]
+        for row, cells in enumerate(self.game.board):
+            marks = ' '.join({'B': 'X', 'W': 'O'}.get(cell, '.') for cell in cells)
+            lines.append(f'{size - row:>2} {marks}')
+        return '\n' + '\n'.join(lines)
+
+    def cmd_final_score(self, args):
+        score = self.game.calculate_score()
+        margin = score['B Score'] - score['W Score'] - self.komi
+        if margin == 0:
+            return '0'
+        return f"B+{margin:g}" if margin > 0 else f"W+{-margin:g}"
+
+    def cmd_time_settings(self, args):
+        try:
+            main_time, byo_yomi_time, byo_yomi_stones = (int(arg) for arg in args[:3])
+        except ValueError:
+            raise GTPError("syntax error")
+        self.time_settings = (main_time, byo_yomi_time, byo_yomi_stones)
+        self.time_left = {}
+        return ''
+
+    def cmd_time_left(self, args):
+        if len(args) < 3:
+            raise GTPError("syntax error")
+        color = self.parse_color(args[0])
+        try:
+            self.time_left[color] = (float(args[1]), int(args[2]))
+        except ValueError:
+            raise GTPError("syntax error")
+        return ''
+
+    def cmd_interrupt(self, args):
+        # The running search, if any, was already stopped when the command was read
+        return ''
+
+    async def execute(self, line):
+        """
+        Runs one command line.
+
+        Returns:
+        str: The GTP response, ending with the blank line, or None for an empty line.
+        """
+        line = line.split('#', 1)[0].replace('\t', ' ').strip()
+        if not line:
+            return None
+        words = line.split()
+        command_id = ''
+        if words[0].isdigit():
+            command_id = words.pop(0)
+            if not words:
+                return f'?{command_id} missing command\n\n'
+        command, args = words[0].lower(), words[1:]
+        handler = self.commands.get(command)
+        if handler is None:
+            return f'?{command_id} unknown command\n\n'
+        try:
+            result = handler(args)
+            if asyncio.iscoroutine(result):
+                result = await result
+        except GTPError as error:
+            return f'?{command_id} {error}\n\n'
+        return f'={command_id} {result}'.rstrip(' ') + '\n\n'
+
+    async def run(self, input=None, output=None):
+        """
+        Reads commands from input and writes the responses to output until quit or the end of the input.
+        Lines are read by a daemon thread, so an interrupt can stop a search that is running,
+        and a controller that keeps the input open after quit does not hold up the exit.
+
+        Parameters:
+        input (file, optional): The text stream to read commands from. Defaults to standard input.
+        output (file, optional): The text stream to write responses to. Defaults to standard output.
+        """
+        input = input if input is not None else sys.stdin
+        output = output if output is not None else sys.stdout
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+
+        def read_lines():
+            for number, line in enumerate(iter(input.readline, ''), 1):
+                # GoGui interrupts with a comment line, so it is checked before comments are dropped
+                if line.split() == ['#', 'interrupt']:
+                    self._interrupt_line = number
+                words = line.split('#', 1)[0].split()
+                if words and words[0].isdigit():
+                    words = words[1:]
+                if words[:1] == ['interrupt']:
+                    self._interrupt_line = number
+                loop.call_soon_threadsafe(queue.put_nowait, (number, line))
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+
+        threading.Thread(target=read_lines, daemon=True).start()
+        try:
+            while self.running:
+                item = await queue.get()
+                if item is None:
+                    break
+                self._command_line, line = item
+                response = await self.execute(line)
+                if response is not None:
+                    output.write(response)
+                    output.flush()
+        finally:
+            self._executor.shutdown(wait=True)
+            if self.tree is not None:
+                self.tree.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Runs the bot as a Go Text Protocol engine on standard input and output.")
+    parser.add_argument('--size', type=int, default=9, help="initial size of the board")
+    parser.add_argument('--iterations', type=int, default=1000, help="most iterations of every search")
+    parser.add_argument('--move-time', type=float, help="most seconds of every search")
+    parser.add_argument('--policy', default='light', help="playout policy of the searches")
+    parser.add_argument('--book', help="opening book file to play from before searching")
+    args = parser.parse_args(argv)
+    book = OpeningBook(args.book) if args.book else None
+    engine = GTPEngine(args.size, iterations=args.iterations, move_time=args.move_time, policy=args.policy, book=book)
+    try:
+        asyncio.run(engine.run())
+    finally:
+        if book is not None:
+            book.close()
+
+
+if __name__ == "__main__":
+    main()
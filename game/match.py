@@ -0,0 +1,262 @@
+import argparse
+import ast
+import json
+import math
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .go_game import GoGame
+from .mct import MonteCarloTree
+from .sgf import SGFWriter
+
+
+class Engine:
+    """
+    The settings of one player of a match: its search budget per move and its MonteCarloTree options.
+    """
+    def __init__(self, name, iterations=None, time_limit=None, **options):
+        """
+        Parameters:
+        name (str): The name of the engine in the results.
+        iterations (int, optional): The iterations of every search.
+        time_limit (float, optional): The seconds every search may take. At least one budget is needed.
+        options: The keyword arguments of MonteCarloTree, such as policy or rave.
+        """
+        if iterations is None and time_limit is None:
+            raise ValueError(f"Engine {name} needs a number of iterations or a time limit")
+        self.name = name
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.options = options
+
+    @classmethod
+    def parse(cls, name, text):
+        """
+        Creates an engine from comma separated settings, such as 'iterations=200,policy="light"'.
+        Values are read as Python literals, and taken as strings when they are not one.
+        """
+        settings = {}
+        for item in filter(None, text.split(',')):
+            key, _, value = item.partition('=')
+            try:
+                settings[key.strip()] = ast.literal_eval(value.strip())
+            except (ValueError, SyntaxError):
+                settings[key.strip()] = value.strip()
+        return cls(name, **settings)
+
+    def __repr__(self):
+        return f"Engine({self.name!r}, iterations={self.iterations}, time_limit={self.time_limit}, options={self.options})"
+
+
+def play_match_game(black, white, board_size, seed, max_moves=None):
+    """
+    Plays one game between two engines without any console interaction.
+    Every engine keeps its own tree for the whole game, advanced by every move played.
+
+    Parameters:
+    black (Engine): The engine playing black.
+    white (Engine): The engine playing white.
+    board_size (int): The size of the board.
+    seed (int): The seed of the game's searches.
+    max_moves (int, optional): The most moves before the game is scored as it stands.
+    Defaults to three times the board area.
+
+    Returns:
+    dict: The winner ('B', 'W' or 'Tie'), the scores, the moves played, and the seconds every move took
+    for each color.
+    """
+    random.seed(seed)
+    if max_moves is None:
+        max_moves = 3 * board_size * board_size
+    game = GoGame(board_size)
+    engines = {'B': black, 'W': white}
+    trees = {'B': None, 'W': None}
+    latencies = {'B': [], 'W': []}
+    moves = []
+    try:
+        while not game.is_over and len(moves) < max_moves:
+            color = game.current_player
+            engine = engines[color]
+            if trees[color] is None:
+                trees[color] = MonteCarloTree(game, **engine.options)
+            start = time.perf_counter()
+            move = trees[color].best_move(iterations=engine.iterations, time_limit=engine.time_limit)
+            latencies[color].append(time.perf_counter() - start)
+
+            game.make_move(*move)
+            moves.append(move)
+            for tree in trees.values():
+                if tree is not None:
+                    tree.advance(move)
+    finally:
+        for tree in trees.values():
+            if tree is not None:
+                tree.close()
+
+    score = game.calculate_score()
+    return {'winner': score['winner'], 'B Score': score['B Score'], 'W Score': score['W Score'],
+            'moves': moves, 'latencies': latencies}
+
+
+def _play_pairing(args):
+    first, second, board_size, seed, max_moves, swap = args
+    black, white = (second, first) if swap else (first, second)
+    result = play_match_game(black, white, board_size, seed, max_moves)
+    result['black'] = black.name
+    result['white'] = white.name
+    return result
+
+
+def wilson_interval(wins, games, z=1.96):
+    """
+    Returns the Wilson score interval of a win rate, 95% by default.
+
+    Parameters:
+    wins (float): The wins, ties counting as half a win.
+    games (int): The games played.
+    z (float, optional): The standard normal quantile of the confidence level. Defaults to 1.96.
+
+    Returns:
+    tuple: The lower and upper bounds of the win rate.
+    """
+    if games == 0:
+        return 0.0, 1.0
+    rate = wins / games
+    denominator = 1 + z * z / games
+    center = (rate + z * z / (2 * games)) / denominator
+    margin = z * math.sqrt(rate * (1 - rate) / games + z * z / (4 * games * games)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def percentile(values, fraction):
+    """
+    Returns the given fraction percentile of the values, interpolating between the closest ranks.
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    position = (len(values) - 1) * fraction
+    lower = math.floor(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def summarize(results, engines, seconds):
+    """
+    Aggregates the results of a match.
+
+    Parameters:
+    results (list): The results of every game, from play_match_game with the engine names added.
+    engines (list): The two engines of the match.
+    seconds (float): The wall-clock seconds the match took.
+
+    Returns:
+    dict: The games and moves played, the moves per second, and for every engine its wins, ties,
+    win rate with its 95% confidence interval, and move latency percentiles.
+    """
+    total_moves = sum(len(result['moves']) for result in results)
+    summary = {'games': len(results), 'moves': total_moves, 'seconds': seconds,
+               'moves_per_second': total_moves / seconds if seconds else None, 'engines': {}}
+    for engine in engines:
+        wins = ties = 0
+        latencies = []
+        for result in results:
+            for color, name in (('B', result['black']), ('W', result['white'])):
+                if name != engine.name:
+                    continue
+                latencies.extend(result['latencies'][color])
+                if result['winner'] == color:
+                    wins += 1
+                elif result['winner'] == 'Tie':
+                    ties += 1
+        games = len(results)
+        score = wins + ties / 2
+        summary['engines'][engine.name] = {
+            'wins': wins,
+            'ties': ties,
+            'win_rate': score / games if games else None,
+            'win_rate_95': wilson_interval(score, games),
+            'latency_p50': percentile(latencies, 0.5),
+            'latency_p90': percentile(latencies, 0.9),
+            'latency_p99': percentile(latencies, 0.99),
+        }
+    return summary
+
+
+def run_match(first, second, games, board_size=9, processes=1, seed=0, max_moves=None, on_result=None):
+    """
+    Plays a match between two engines, alternating colors, with the games spread over a process pool.
+
+    Parameters:
+    first (Engine): The engine playing black in the even games.
+    second (Engine): The engine playing black in the odd games.
+    games (int): The number of games.
+    board_size (int, optional): The size of the board. Defaults to 9.
+    processes (int, optional): The number of processes playing games at once. Defaults to 1.
+    seed (int, optional): The seed of the first game, every next game adds one. Defaults to 0.
+    max_moves (int, optional): The most moves of a game, see play_match_game.
+    on_result (callable, optional): Called with the result of every game as soon as it and the games
+    before it are finished, so that a long match can be saved as it goes. Defaults to None.
+
+    Returns:
+    tuple: The summary from summarize, and the results of every game in order.
+    """
+    if first.name == second.name:
+        raise ValueError("The engines of a match need different names")
+    pairings = [(first, second, board_size, seed + index, max_moves, index % 2 == 1) for index in range(games)]
+    start = time.perf_counter()
+    results = []
+    executor = ProcessPoolExecutor(max_workers=processes) if processes > 1 else None
+    try:
+        played = executor.map(_play_pairing, pairings) if executor is not None else map(_play_pairing, pairings)
+        for result in played:
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    return summarize(results, [first, second], time.perf_counter() - start), results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plays a headless match between two MonteCarloTree settings.")
+    parser.add_argument('--a', default='iterations=100,policy=light',
+                        help="settings of engine A, comma separated MonteCarloTree options plus iterations/time_limit")
+    parser.add_argument('--b', default='iterations=100,policy=uniform', help="settings of engine B")
+    parser.add_argument('--games', type=int, default=10, help="number of games, colors alternate")
+    parser.add_argument('--size', type=int, default=9, help="size of the board")
+    parser.add_argument('--processes', type=int, default=1, help="number of games played at once")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first game")
+    parser.add_argument('--max-moves', type=int, help="moves before a game is scored as it stands")
+    parser.add_argument('--output', help="file to write the summary and every game's result to as JSON")
+    parser.add_argument('--sgf', help="SGF file to append every game to")
+    args = parser.parse_args(argv)
+
+    first = Engine.parse('A', args.a)
+    second = Engine.parse('B', args.b)
+    writer = SGFWriter(args.sgf) if args.sgf else None
+
+    def save_game(result):
+        game = GoGame(args.size)
+        for move in result['moves']:
+            game.make_move(*move)
+        writer.write(game, PB=result['black'], PW=result['white'])
+
+    try:
+        summary, results = run_match(first, second, args.games, args.size, args.processes, args.seed,
+                                     args.max_moves, save_game if writer is not None else None)
+    finally:
+        if writer is not None:
+            writer.close()
+    json.dump(summary, sys.stdout, indent=2)
+    print()
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'summary': summary, 'games': results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
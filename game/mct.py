@@ -1,65 +1,657 @@
+import heapq
 import random
 import math
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from .playout import PLAYOUT_POLICIES
+
+
+class TranspositionTable:
+    """
+    A bounded table of search statistics keyed by position. Nodes that reach the same
+    position through different move orders share one entry, so their visits and wins add up.
+    """
+    def __init__(self, capacity=100000, eviction='lru'):
+        """
+        Parameters:
+        capacity (int, optional): The maximum number of positions kept. Defaults to 100000.
+        eviction (str, optional): 'lru' to drop the least recently used position when full,
+        or 'visits' to drop the least visited tenth of the table. Defaults to 'lru'.
+        """
+        if eviction not in ('lru', 'visits'):
+            raise ValueError(f"Unknown eviction policy: {eviction}")
+        self.capacity = capacity
+        self.eviction = eviction
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def lookup(self, key):
+        """
+        Returns the statistics of a position, creating an empty entry if it is not in the table.
+
+        Parameters:
+        key: The key of the position, see MonteCarloTree.table_key.
+
+        Returns:
+        list: The shared [visits, wins] entry of the position.
+        """
+        stats = self.entries.get(key)
+        if stats is None:
+            if len(self.entries) >= self.capacity:
+                self.evict()
+            stats = self.entries[key] = [0, 0]
+        elif self.eviction == 'lru':
+            self.entries.move_to_end(key)
+        return stats
+
+    def evict(self):
+        """
+        Removes positions from the table according to the eviction policy.
+        Nodes already holding an evicted entry keep their statistics.
+        """
+        if self.eviction == 'lru':
+            self.entries.popitem(last=False)
+        else:
+            count = max(1, self.capacity // 10)
+            for key in heapq.nsmallest(count, self.entries, key=lambda k: self.entries[k][0]):
+                del self.entries[key]
+
+
+class SearchStats:
+    """
+    Telemetry of one search: how many iterations, playouts and nodes it made, how deep it went,
+    how long the playouts were, and how its time was split between the four steps of an iteration.
+    Times are in seconds. Playout lengths are not known with the 'batch' policy.
+    """
+    def __init__(self):
+        self.iterations = 0
+        self.playouts = 0
+        self.nodes_created = 0
+        self.max_depth = 0
+        self.total_depth = 0
+        self.playout_moves = 0
+        self.select_time = 0.0
+        self.expand_time = 0.0
+        self.simulate_time = 0.0
+        self.backpropagate_time = 0.0
+        self.seconds = 0.0
+
+    @property
+    def mean_depth(self):
+        """
+        The mean depth of the nodes simulated from, the root being at depth 0.
+        """
+        return self.total_depth / self.iterations if self.iterations else 0.0
+
+    @property
+    def mean_playout_length(self):
+        """
+        The mean number of moves in a playout.
+        """
+        return self.playout_moves / self.playouts if self.playouts else 0.0
+
+    def merge(self, other):
+        """
+        Adds the statistics of another search, such as a parallel worker's, to these.
+        Step times add up over the workers, while seconds keeps the longest search.
+        """
+        self.iterations += other.iterations
+        self.playouts += other.playouts
+        self.nodes_created += other.nodes_created
+        self.max_depth = max(self.max_depth, other.max_depth)
+        self.total_depth += other.total_depth
+        self.playout_moves += other.playout_moves
+        self.select_time += other.select_time
+        self.expand_time += other.expand_time
+        self.simulate_time += other.simulate_time
+        self.backpropagate_time += other.backpropagate_time
+        self.seconds = max(self.seconds, other.seconds)
+
+    def as_dict(self):
+        """
+        Returns the statistics as a dictionary, for logging or exporting.
+        """
+        result = dict(vars(self))
+        result['mean_depth'] = self.mean_depth
+        result['mean_playout_length'] = self.mean_playout_length
+        return result
+
+    def __repr__(self):
+        return f"SearchStats({self.as_dict()})"
+
+
+def _search_worker(game, player, options, iterations, time_limit, seed):
+    """
+    Runs an independent search in a worker process, for the given iterations and/or seconds.
+
+    Returns:
+    tuple: The root visits, the root wins, a list of (move, visits, wins) for every root child,
+    and the SearchStats of the search if they were collected.
+    """
+    random.seed(seed)
+    tree = MonteCarloTree(game, **options)
+    tree.player = player
+    deadline = time.monotonic() + time_limit if time_limit is not None else None
+    tree.search(iterations, deadline)
+    root = tree.root
+    return root.visits, root.wins, [(child.move, child.visits, child.wins) for child in root.children], tree.stats
+
 
 class MonteCarloTree:
-    def __init__(self, game):
-        self.game = game
-        self.root = Node(game=self.game)
+    def __init__(self, game, table=None, workers=1, policy='uniform', batch_size=256, rave=False, rave_k=500,
+                 scoring='fast', collect_stats=False, parallel='root', virtual_loss=1, capacity=200000,
+                 book=None):
+        """
+        Parameters:
+        game (GoGame): The position to search from.
+        table (TranspositionTable, optional): A table through which nodes reaching the same
+        position share their statistics. Defaults to None, where every node keeps its own.
+        workers (int, optional): The number of processes searching in parallel. Defaults to 1, a serial search.
+        parallel (str, optional): How workers search in parallel, 'root' for independent trees from the root
+        whose root statistics are merged before a move is chosen, or 'tree' for one tree in shared memory
+        searched by every worker, see SharedTree. Defaults to 'root'.
+        virtual_loss (int, optional): The losses a worker of a 'tree' search adds to the nodes on its path
+        until its result is backpropagated, to steer other workers to other paths. Defaults to 1.
+        capacity (int, optional): The most nodes of the shared tree of a 'tree' search. Defaults to 200000.
+        policy (str, optional): The playout policy, 'uniform' to pick every move at random from all valid
+        moves, 'light' for fast random playouts that keep their eyes and only pass when nothing
+        else is left, or 'batch' to evaluate every leaf with batch_size light playouts run at once
+        with NumPy. Defaults to 'uniform'.
+        batch_size (int, optional): The number of playouts per leaf with the 'batch' policy. The batch only
+        outruns light playouts when it is large enough to cover the cost of every NumPy call. Defaults to 256.
+        rave (bool, optional): Whether to blend all-moves-as-first (AMAF) statistics into child selection,
+        which counts every move a player made later in the tree or the playout as if it was played first.
+        Not available with the 'batch' policy. Defaults to False.
+        rave_k (float, optional): The number of visits at which a child's own statistics and its AMAF
+        statistics weigh about the same, see rave_beta. Defaults to 500.
+        scoring (str, optional): How playouts are scored, 'fast' with GoGame.fast_score or 'flood' with
+        GoGame.calculate_score. Both give the same result. Defaults to 'fast'.
+        collect_stats (bool, optional): Whether every search records a SearchStats in stats.
+        Searches also collect them while hooks are added, see add_hook. Defaults to False,
+        where searches run without any timing. Not available for 'tree' searches.
+        book (OpeningBook, optional): An opening book consulted by best_move before searching.
+        Defaults to None.
+        """
+        if policy not in PLAYOUT_POLICIES and policy != 'batch':
+            raise ValueError(f"Unknown playout policy: {policy}")
+        if scoring not in ('fast', 'flood'):
+            raise ValueError(f"Unknown scoring method: {scoring}")
+        if rave and policy == 'batch':
+            raise ValueError("RAVE needs the moves of every playout, which the 'batch' policy does not keep")
+        if parallel not in ('root', 'tree'):
+            raise ValueError(f"Unknown parallel search: {parallel}")
+        if parallel == 'tree' and rave:
+            raise ValueError("RAVE is not available with tree-parallel search")
+        self.parallel = parallel
+        self.book = book
+        self.virtual_loss = virtual_loss
+        self.capacity = capacity
+        self.rave = rave
+        self.rave_k = rave_k
+        self.scoring = scoring
+        self.collect_stats = collect_stats
+        # The statistics of the last search, when collected
+        self.stats = None
+        self._hooks = {'iteration': [], 'search': []}
+        # The moves of the last playout, packed like the moves of the nodes
+        self.playout_moves = []
+        self.table = table
+        self.workers = workers
+        self.policy = policy
+        self.batch_size = batch_size
+        if policy == 'batch':
+            from .batch import BatchPlayout
+            # Seeded from the random module, so that random.seed makes batch searches reproducible too
+            self.batch = BatchPlayout(game.board_size, seed=random.getrandbits(32))
+            self.playouts_per_leaf = batch_size
+        else:
+            self.batch = None
+            self.playout = PLAYOUT_POLICIES[policy]
+            self.playouts_per_leaf = 1
+        self._executor = None
+        # Background search run on the opponent's time, see start_pondering
+        self._ponder_thread = None
+        self._ponder_stop = None
+        self._ponder_error = None
+        self.pondered = 0
+        # The number of iterations the last search ran, summed over the workers of a parallel search
+        self.iterations_run = 0
+        # Whether the last search ended because its most visited root child could no longer be overtaken
+        self.stopped_early = False
+        # Results are scored for the player to move at the start, which stays fixed as the root advances
+        self.player = game.current_player
+
+        # Nodes store moves as row * board_size + col, with board_size ** 2 standing for a pass
+        size = game.board_size
+        self.pass_move = size * size
+        self._actions = [(row, col) for row in range(size) for col in range(size)] + [("pass", 0)]
+
+        # Only the root position is kept, the position of any other node is replayed from it
+        self.root_game = game.clone()
+        self.root = self.new_node(game=self.root_game)
+
+    @staticmethod
+    def table_key(game):
+        """
+        Returns the transposition table key of a position: its Zobrist hash and the pass counter,
+        so that positions one pass away from the end of the game are kept apart.
+        """
+        return (game.position_hash, game.pass_counter)
 
-    def best_move(self, iterations):
+    def new_node(self, game, move=None, parent=None):
+        """
+        Creates a node for the given position, attaching it to the transposition table if there is one.
+        """
+        stats = self.table.lookup(self.table_key(game)) if self.table is not None else None
+        return Node(move=move, parent=parent, stats=stats, terminal=game.is_over)
+
+    def encode_action(self, action):
+        """
+        Packs an action, (row, col) or ("pass", 0), into the integer move stored in the nodes.
+        """
+        if action[0] == "pass":
+            return self.pass_move
+        return action[0] * self.root_game.board_size + action[1]
+
+    def decode_action(self, move):
+        """
+        Unpacks an integer move stored in the nodes into an action, (row, col) or ("pass", 0).
+        """
+        return self._actions[move]
+
+    def book_move(self):
+        """
+        Returns the opening book's move of the root position, for the callers that play it instead of searching.
+        iterations_run is reset when the book has a move.
+
+        Returns:
+        action: The book move, or None if the tree has no book or the book does not hold the position.
+        """
+        if self.book is None:
+            return None
+        move = self.book.lookup(self.root_game)
+        if move is not None:
+            self.iterations_run = 0
+        return move
+
+    def best_move(self, iterations=None, time_limit=None, deadline=None, early_stop=False):
         """
         Determines the best move to make from the root node based on the results of multiple simulations.
+        The search runs until the playout budget is spent or the deadline passes, whichever comes first,
+        and always runs at least one simulation. iterations_run holds the number actually run.
+        When the tree has an opening book holding the root position, its move is returned without searching.
 
         Parameters:
-        iterations (int): The number of simulations to run.
+        iterations (int, optional): The number of simulations to run, in every worker when searching in parallel.
+        time_limit (float, optional): The number of seconds the search may take.
+        deadline (float, optional): The time.monotonic() value by which the search must finish.
+        early_stop (bool, optional): Whether to stop as soon as the most visited root child cannot be
+        overtaken within the remaining playout budget. When the search does stop early, that child is
+        returned. Defaults to False.
 
         Returns:
         action: The action associated with the best child of the root node after all simulations are run.
         """
-        for _ in range(iterations):
-            node = self.select_node(self.root)
-            simulation_result = self.simulate(node)
-            self.backpropagate(node, simulation_result)
+        self.stop_pondering()
+        if iterations is None and time_limit is None and deadline is None:
+            raise ValueError("best_move needs a number of iterations, a time limit or a deadline")
+        if time_limit is not None:
+            limit = time.monotonic() + time_limit
+            deadline = limit if deadline is None else min(deadline, limit)
+
+        move = self.book_move()
+        if move is not None:
+            return move
+
+        self.stopped_early = False
+        if self.workers > 1 and self.parallel == 'tree':
+            self.search_tree_parallel(iterations, deadline)
+        elif self.workers > 1:
+            self.search_parallel(iterations, deadline)
+        else:
+            self.search(iterations, deadline, early_stop)
 
-        return self.get_best_child(self.root).action
+        if self.stopped_early:
+            return self.decode_action(self.get_most_visited_child(self.root).move)
+        return self.decode_action(self.get_best_child(self.root).move)
 
-    def select_node(self, node):
+    def search(self, iterations=None, deadline=None, early_stop=False):
         """
-        Selects a node for simulation. If the node is not fully expanded, it expands the node.
-        Otherwise, it selects the best child according to the UCT formula.
+        Runs select, simulate and backpropagate iterations from the root until the number of
+        iterations is reached or the deadline passes. At least one iteration is always run.
+        With early_stop, the search also ends once the most visited root child leads the runner-up
+        by more visits than there are iterations left, and stopped_early is set.
+        While stats are collected or hooks are added, the search records a SearchStats in stats
+        and calls the hooks.
+
+        Returns:
+        int: The number of iterations run.
+        """
+        self.stopped_early = False
+        iteration_hooks = self._hooks['iteration']
+        stats = None
+        if self.collect_stats or iteration_hooks or self._hooks['search']:
+            stats = self.stats = SearchStats()
+            start = time.perf_counter()
+
+        count = 0
+        while iterations is None or count < iterations:
+            node, simulation_result = self.iterate(stats)
+            count += 1
+            for hook in iteration_hooks:
+                hook(self, node, simulation_result)
+
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            if early_stop and iterations is not None and self.is_decided((iterations - count) * self.playouts_per_leaf):
+                self.stopped_early = True
+                break
+
+        self.iterations_run = count
+        if stats is not None:
+            stats.iterations = count
+            stats.seconds = time.perf_counter() - start
+            for hook in self._hooks['search']:
+                hook(self, stats)
+        return count
+
+    def iterate(self, stats=None):
+        """
+        Runs one iteration from the root: descends to a node that is not fully expanded, expands it,
+        simulates from the new node and backpropagates the result. Every search runs its iterations
+        through here, the steps are only timed into stats when they are collected.
 
         Parameters:
-        node (Node): The node from which to start the selection.
+        stats (SearchStats, optional): Statistics to add the time of every step and the shape of the
+        iteration to. Defaults to None.
 
         Returns:
-        Node: The selected node for the next simulation.
+        tuple: The node simulated from, and the simulation result.
         """
-        while not node.is_terminal():
-            if not node.is_fully_expanded():
-                return self.expand(node)
-            else:
-                node = self.get_best_child(node)
+        # The clock is only read when the steps are timed
+        timed = stats is not None
+        if timed:
+            step = time.perf_counter()
+        state = self.root_game.clone()
+        leaf = self.descend(self.root, state)
+        if timed:
+            expanded = time.perf_counter()
+        node = leaf if leaf.is_terminal() else self.expand(leaf, state)
+        if timed:
+            simulated = time.perf_counter()
+        simulation_result = self.simulate(node, state)
+        if timed:
+            backpropagated = time.perf_counter()
+        self.backpropagate(node, simulation_result, self.playouts_per_leaf)
+        if self.rave:
+            self.update_amaf(node, self.playout_moves, simulation_result)
+        if not timed:
+            return node, simulation_result
+
+        done = time.perf_counter()
+        stats.select_time += expanded - step
+        stats.expand_time += simulated - expanded
+        stats.simulate_time += backpropagated - simulated
+        stats.backpropagate_time += done - backpropagated
+        stats.playouts += self.playouts_per_leaf
+        if self.batch is None:
+            stats.playout_moves += len(self.playout_moves)
+        if node is not leaf:
+            stats.nodes_created += 1
+        depth = 0
+        parent = node.parent
+        while parent is not None:
+            depth += 1
+            parent = parent.parent
+        stats.total_depth += depth
+        stats.max_depth = max(stats.max_depth, depth)
+        return node, simulation_result
+
+    def add_hook(self, event, callback):
+        """
+        Adds a callback run during serial searches, for profilers or metrics exporters.
+        While any hook is added, searches collect their SearchStats.
+
+        Parameters:
+        event (str): 'iteration' to be called after every iteration as callback(tree, node, result),
+        with the node simulated from and the simulation result, or 'search' to be called at the end
+        of every search as callback(tree, stats).
+        callback (callable): The function to call.
+        """
+        if event not in self._hooks:
+            raise ValueError(f"Unknown hook event: {event}")
+        self._hooks[event].append(callback)
+
+    def remove_hook(self, event, callback):
+        """
+        Removes a callback added with add_hook.
+        """
+        self._hooks[event].remove(callback)
+
+    def is_decided(self, remaining):
+        """
+        Checks whether the most visited root child can still be overtaken within the remaining visits.
+        """
+        first = second = 0
+        for child in self.root.children:
+            visits = child.stats[0]
+            if visits > first:
+                first, second = visits, first
+            elif visits > second:
+                second = visits
+        return first > 0 and first - second > remaining
+
+    def search_parallel(self, iterations=None, deadline=None):
+        """
+        Runs an independent search in every worker process, starting from the root position,
+        and merges their root statistics into the root's children.
+        Every worker runs the given number of iterations or until the deadline, whichever comes first.
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        time_limit = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+        seeds = [random.getrandbits(32) for _ in range(self.workers)]
+        futures = [self._executor.submit(_search_worker, self.root_game, self.player,
+                                           {'policy': self.policy, 'batch_size': self.batch_size,
+                                            'rave': self.rave, 'rave_k': self.rave_k, 'scoring': self.scoring,
+                                            'collect_stats': self.collect_stats},
+                                           iterations, time_limit, seed)
+                   for seed in seeds]
+        self.iterations_run = 0
+        self.stats = SearchStats() if self.collect_stats else None
+        results = []
+        for future in futures:
+            *result, worker_stats = future.result()
+            self.iterations_run += result[0]
+            results.append(result)
+            if self.stats is not None:
+                self.stats.merge(worker_stats)
+        self.merge_root_statistics(results)
+
+    def search_tree_parallel(self, iterations=None, deadline=None):
+        """
+        Runs every worker process on one tree in shared memory, starting from the root position,
+        and merges the root statistics of the shared tree into the root's children.
+        Every worker runs the given number of iterations or until the deadline, whichever comes first.
+        The shared tree is freed after the search, only the root children of this tree keep its statistics.
+        """
+        from .shared_tree import SharedTree, _init_worker, _tree_worker
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                 initargs=(multiprocessing.Lock(),))
+        time_limit = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+        seeds = [random.getrandbits(32) for _ in range(self.workers)]
+        tree = SharedTree(self.capacity)
+        try:
+            futures = [self._executor.submit(_tree_worker, tree.name, self.capacity, self.root_game, self.player,
+                                               {'policy': self.policy, 'batch_size': self.batch_size,
+                                                'scoring': self.scoring},
+                                               iterations, time_limit, seed, self.virtual_loss)
+                       for seed in seeds]
+            self.iterations_run = sum(future.result() for future in futures)
+            self.merge_root_statistics([tree.root_results()])
+        finally:
+            tree.close()
+            tree.unlink()
+        self.stats = None
+
+    def merge_root_statistics(self, results):
+        """
+        Adds the root statistics of other searches of the same position to this tree,
+        creating root children for moves only the other searches expanded.
+
+        Parameters:
+        results (iterable): Tuples of root visits, root wins, and (move, visits, wins) for every root child.
+        """
+        children = {child.move: child for child in self.root.children}
+        for visits, wins, child_results in results:
+            self.root.stats[0] += visits
+            self.root.stats[1] += wins
+            for move, child_visits, child_wins in child_results:
+                child = children.get(move)
+                if child is None:
+                    self.root.discard_untried(move)
+                    next_state = self.root_game.clone()
+                    next_state.make_move(*self.decode_action(move))
+                    child = children[move] = self.new_node(game=next_state, move=move, parent=self.root)
+                    self.root.add_child(child)
+                child.stats[0] += child_visits
+                child.stats[1] += child_wins
+
+    def start_pondering(self, chunk=10):
+        """
+        Starts searching from the root in a background thread, typically while waiting for the
+        opponent's move. The search runs in chunks of iterations until stop_pondering is called,
+        and advancing the tree to the move played keeps the statistics gathered under it.
+        Pondering always runs a serial search. Does nothing if the tree is already pondering.
+
+        Parameters:
+        chunk (int, optional): The number of iterations between checks for the stop request. Defaults to 10.
+        """
+        if self._ponder_thread is not None:
+            return
+        self.pondered = 0
+        self._ponder_error = None
+        self._ponder_stop = threading.Event()
+        self._ponder_thread = threading.Thread(target=self._ponder, args=(chunk,), daemon=True)
+        self._ponder_thread.start()
+
+    def _ponder(self, chunk):
+        try:
+            while not self._ponder_stop.is_set():
+                self.pondered += self.search(chunk)
+        except Exception as error:
+            self._ponder_error = error
+
+    def stop_pondering(self):
+        """
+        Stops the background search started by start_pondering and waits for its current chunk to finish.
+        best_move, advance and close stop pondering themselves. Does nothing if the tree is not pondering.
+
+        Returns:
+        int: The number of iterations run while pondering.
+        """
+        if self._ponder_thread is None:
+            return 0
+        self._ponder_stop.set()
+        self._ponder_thread.join()
+        self._ponder_thread = None
+        if self._ponder_error is not None:
+            error, self._ponder_error = self._ponder_error, None
+            raise error
+        return self.pondered
+
+    @property
+    def is_pondering(self):
+        """
+        Whether a background search started by start_pondering is running.
+        """
+        return self._ponder_thread is not None
+
+    def close(self):
+        """
+        Stops pondering and shuts down the worker processes used by parallel searches, if any were started.
+        """
+        self.stop_pondering()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def advance(self, action):
+        """
+        Moves the root of the tree forward by a move that was actually played, by either player.
+        The child reached by the move becomes the new root and keeps its statistics,
+        while the rest of the tree is released.
+
+        Parameters:
+        action (tuple): The move played, as (row, col) or ("pass", 0).
+
+        Returns:
+        Node: The new root node.
+        """
+        self.stop_pondering()
+        if not self.root_game.make_move(*action):
+            raise ValueError(f"Move {tuple(action)} is not valid in the current position")
+
+        move = self.encode_action(action)
+        for child in self.root.children:
+            if child.move == move:
+                new_root = child
+                break
+        else:
+            new_root = self.new_node(game=self.root_game, move=move)
+
+        new_root.parent = None
+        self.root = new_root
+        return new_root
+
+    def descend(self, node, state):
+        """
+        Follows the best children according to the UCT formula from the given node,
+        down to a node that is terminal or not fully expanded.
+        The moves leading to that node are played on the given state.
+
+        Parameters:
+        node (Node): The node from which to start.
+        state (GoGame): A copy of the position of the starting node.
+
+        Returns:
+        Node: The node reached.
+        """
+        while not node.is_terminal() and node.is_fully_expanded(state, self.pass_move):
+            node = self.get_best_child(node)
+            state.make_move(*self.decode_action(node.move))
         return node
 
-    def expand(self, node):
+    def expand(self, node, state):
         """
         Expands the given node by creating a new child node for an untried action.
         If there are no untried actions, the node itself is returned.
 
         Parameters:
         node (Node): The node to expand.
+        state (GoGame): The position of the node, which the chosen move is played on.
 
         Returns:
         Node: The new child node, or the original node if there are no untried actions.
         """
-        actions = node.untried_actions()
+        moves = node.untried_actions(state, self.pass_move)
         
-        # Check if there are available actions to choose from
-        if actions:
-            action = random.choice(actions)
-            next_state = node.game.clone()
-            next_state.make_move(*action)
-            new_node = Node(game=next_state, action=action, parent=node)
+        # Check if there are available actions to choose from, they are kept in random order
+        if moves:
+            move = moves.pop()
+            state.make_move(*self.decode_action(move))
+            new_node = self.new_node(game=state, move=move, parent=node)
             node.add_child(new_node)
             return new_node
         else:
@@ -67,22 +659,23 @@ class MonteCarloTree:
             return node
 
 
-    def simulate(self, node):
+    def simulate(self, node, state):
         """
-        Runs a simulation from the given node until a terminal state is reached.
-        At each step, a move is randomly selected from the valid moves.
+        Runs a simulation from the given node until a terminal state is reached,
+        choosing the moves with the tree's playout policy.
+        With the 'batch' policy, playouts_per_leaf playouts are run and their score values added up.
 
         Parameters:
         node (Node): The node from which to start the simulation.
+        state (GoGame): The position of the node, which is played out in place.
 
         Returns:
         float: The score value of the terminal game state.
         """
-        state = node.game.clone()
-        while not state.is_over:
-            valid_moves = state.get_valid_moves()
-            move = random.choice(valid_moves)
-            state.make_move(*move)
+        if self.batch is not None:
+            b_scores, w_scores = self.batch.run(state, self.playouts_per_leaf)
+            return sum(self.get_score_value(int(b_score), int(w_score)) for b_score, w_score in zip(b_scores, w_scores))
+        self.playout_moves = self.playout(state)
         return self.get_simulation_result(state)
 
     def get_simulation_result(self, state):
@@ -96,13 +689,24 @@ class MonteCarloTree:
         Returns:
         float: The score value of the game state.
         """
-        result = state.calculate_score()
-        current_player = self.game.current_player
+        result = state.fast_score() if self.scoring == 'fast' else state.calculate_score()
+        return self.get_score_value(result['B Score'], result['W Score'])
+
+    def get_score_value(self, b_score, w_score):
+        """
+        Converts the final scores of a game into the score value of the player the tree searches for.
 
-        if current_player == 'W':
-            margin = result['W Score'] - result['B Score']
+        Parameters:
+        b_score (int): Black's score.
+        w_score (int): White's score.
+
+        Returns:
+        float: The score value of the game.
+        """
+        if self.player == 'W':
+            margin = w_score - b_score
         else:
-            margin = result['B Score'] - result['W Score']
+            margin = b_score - w_score
 
         if margin > 0:
             return 1 + 0.1 * margin  # Assign higher score for larger margin of victory
@@ -112,27 +716,70 @@ class MonteCarloTree:
             return 0.5  # It's a tie
 
 
-    def backpropagate(self, node, result):
+    def backpropagate(self, node, result, visits=1):
         """
         Backpropagates the simulation result through the tree.
-        Increments 'visits' by 1 and 'wins' by the result for the node and its ancestors.
+        Increments 'visits' by the number of playouts and 'wins' by the result for the node and its ancestors.
 
         Parameters:
         node (Node): The node from which the simulation was run.
         result (float): The result of the simulation to backpropagate.
+        visits (int, optional): The number of playouts the result adds up. Defaults to 1.
 
         Returns:
         None
         """
         while node is not None:
-            node.visits += 1
-            node.wins += result
+            stats = node.stats
+            stats[0] += visits
+            stats[1] += result
             node = node.parent
 
+    def update_amaf(self, node, playout_moves, result):
+        """
+        Updates the all-moves-as-first statistics of the nodes from the given node up to the root.
+        Every node counts the result for each move its player to move made first, from the node on,
+        in the rest of the tree path or in the playout. Passes are not counted.
+
+        Parameters:
+        node (Node): The node from which the simulation was run.
+        playout_moves (list): The moves played in the simulation.
+        result (float): The result of the simulation.
+        """
+        path = []
+        while node is not None:
+            path.append(node)
+            node = node.parent
+        path.reverse()
+        # moves[depth] is the move played from the node at that depth of the path
+        moves = [node.move for node in path[1:]] + list(playout_moves)
+
+        for depth, node in enumerate(path):
+            if node.amaf is None:
+                node.amaf = {}
+            seen = set()
+            for offset, move in enumerate(moves[depth:]):
+                if move in seen or move == self.pass_move:
+                    continue
+                seen.add(move)
+                if offset % 2 == 0:
+                    stats = node.amaf.get(move)
+                    if stats is None:
+                        stats = node.amaf[move] = [0, 0]
+                    stats[0] += 1
+                    stats[1] += result
+
+    def rave_beta(self, visits):
+        """
+        Returns the weight of the AMAF value in a child's value, which fades as the child gets its own visits.
+        """
+        return math.sqrt(self.rave_k / (3 * visits + self.rave_k))
+
     def get_best_child(self, node):
         """
         Selects the best child node using the Upper Confidence Bound for Trees (UCT) formula.
         This balances exploration and exploitation by favoring nodes with high average reward and low visit count.
+        With RAVE, the average reward is blended with the child's AMAF value weighted by rave_beta.
 
         Parameters:
         node (Node): The parent node from which to select the best child.
@@ -141,33 +788,100 @@ class MonteCarloTree:
         Node: The best child node according to the UCT formula.
         """
         children = node.children
+        log_visits = math.log(node.stats[0])
+        if self.rave and node.amaf:
+            def value(child):
+                visits = child.stats[0]
+                mean = child.stats[1] / visits
+                amaf = node.amaf.get(child.move)
+                if amaf:
+                    beta = self.rave_beta(visits)
+                    mean = (1 - beta) * mean + beta * amaf[1] / amaf[0]
+                return mean + math.sqrt(2 * log_visits / visits)
+            return max(children, key=value)
         best_child = max(children,
-                        key=lambda c: c.wins / c.visits + 
-                        math.sqrt(2 * math.log(node.visits) 
-                        / c.visits))
+                        key=lambda c: c.stats[1] / c.stats[0] +
+                        math.sqrt(2 * log_visits
+                        / c.stats[0]))
         return best_child
 
+    def get_most_visited_child(self, node):
+        """
+        Selects the child node with the most visits, which is the most reliable choice once the search is over.
+
+        Parameters:
+        node (Node): The parent node from which to select the child.
+
+        Returns:
+        Node: The most visited child node.
+        """
+        return max(node.children, key=lambda c: c.stats[0])
+
 
 class Node:
-    def __init__(self, game=None, action=None, parent=None):
-        self.game = game
-        self.action = action
+    """
+    A node of the search tree. Nodes only hold their move and statistics,
+    the position of a node is rebuilt by replaying the moves from the root.
+    The legal moves not expanded yet are computed on the first visit and kept in random order.
+    """
+    __slots__ = ('move', 'parent', 'children', 'stats', 'terminal', 'untried', 'amaf')
+
+    def __init__(self, move=None, parent=None, stats=None, terminal=False):
+        self.move = move
         self.parent = parent
         self.children = []
-        self.visits = 0
-        self.wins = 0
+        # [visits, wins], shared with other nodes of the same position when a transposition table is used
+        self.stats = stats if stats is not None else [0, 0]
+        self.terminal = terminal
+        self.untried = None
+        # Move -> [visits, wins] of all-moves-as-first statistics, only kept with RAVE
+        self.amaf = None
+
+    @property
+    def visits(self):
+        return self.stats[0]
+
+    @visits.setter
+    def visits(self, value):
+        self.stats[0] = value
+
+    @property
+    def wins(self):
+        return self.stats[1]
+
+    @wins.setter
+    def wins(self, value):
+        self.stats[1] = value
 
     def is_terminal(self):
-        return self.game.is_over
+        return self.terminal
 
-    def is_fully_expanded(self):
-        return len(self.children) == len(self.untried_actions())
+    def is_fully_expanded(self, game, pass_move):
+        return not self.untried_actions(game, pass_move)
 
-    def untried_actions(self):
-        if self.is_terminal():
-            return []
-        valid_moves = self.game.get_valid_moves()
-        return [action for action in valid_moves if action not in [child.action for child in self.children]]
+    def untried_actions(self, game, pass_move):
+        """
+        Returns the moves of this node that have no child yet, computing them from the node's position on
+        the first call. The returned list is the node's own, expanding a move pops it from the end.
+        Children created before the first call, such as merged root children, are left out.
+        """
+        if self.untried is None:
+            if self.is_terminal():
+                self.untried = []
+            else:
+                size = game.board_size
+                self.untried = [row * size + col for row, col in game.legal_moves()]
+                if game.pass_counter < 4:
+                    self.untried.append(pass_move)
+                if self.children:
+                    expanded = {child.move for child in self.children}
+                    self.untried = [move for move in self.untried if move not in expanded]
+                random.shuffle(self.untried)
+        return self.untried
+
+    def discard_untried(self, move):
+        if self.untried is not None and move in self.untried:
+            self.untried.remove(move)
 
     def add_child(self, node):
         self.children.append(node)
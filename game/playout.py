@@ -0,0 +1,105 @@
+import random
+
+from .go_game import EMPTY, BORDER, _STONES
+
+
+def uniform_playout(game):
+    """
+    Plays the game out until it is over, choosing every move uniformly at random
+    from all valid moves, passes included.
+
+    Parameters:
+    game (GoGame): The position to play out, which is modified in place.
+
+    Returns:
+    list: The moves played, packed as row * board_size + col, with board_size ** 2 for a pass.
+    """
+    size = game.board_size
+    played = []
+    while not game.is_over:
+        row, col = random.choice(game.get_valid_moves())
+        game.make_move(row, col)
+        played.append(size * size if row == "pass" else row * size + col)
+    return played
+
+
+def is_eye(game, point, player):
+    """
+    Checks whether an empty point is a single-point eye of the given player: every neighbour is the
+    player's stone or the edge, and the diagonals hold at most one enemy stone, or none on the edge.
+
+    Parameters:
+    game (GoGame): The position to check.
+    point (int): The index of the point in the flat board.
+    player (int): BLACK or WHITE.
+
+    Returns:
+    bool: True if the point is an eye of the player.
+    """
+    cells = game._cells
+    for neighbor in game._tables.neighbors[point]:
+        if cells[neighbor] != player and cells[neighbor] != BORDER:
+            return False
+
+    opponent = 3 - player
+    enemies = 0
+    edge = 0
+    for diagonal in game._tables.diagonals[point]:
+        if cells[diagonal] == opponent:
+            enemies += 1
+        elif cells[diagonal] == BORDER:
+            edge = 1
+    return enemies + edge < 2
+
+
+def light_playout(game, max_moves=None):
+    """
+    Plays the game out with a light random policy. Empty points are sampled at random and checked
+    for legality only once picked, a player never fills one of its own single-point eyes,
+    and passes only when no other move is left. The playout also stops after max_moves moves.
+
+    Parameters:
+    game (GoGame): The position to play out, which is modified in place.
+    max_moves (int, optional): The most moves to play. Defaults to three times the board area.
+
+    Returns:
+    list: The moves played, packed as row * board_size + col, with board_size ** 2 for a pass.
+    """
+    size = game.board_size
+    if max_moves is None:
+        max_moves = 3 * size * size
+    if game._chains_dirty:
+        game._rebuild_chains()
+
+    cells = game._cells
+    coords = game._tables.coords
+    empties = [point for point in game._tables.points if cells[point] == EMPTY]
+    played = []
+    while not game.is_over and len(played) < max_moves:
+        player = _STONES[game.current_player]
+        # Candidates tried and rejected this turn are swapped past the end of the remaining range
+        remaining = len(empties)
+        while remaining:
+            index = random.randrange(remaining)
+            point = empties[index]
+            remaining -= 1
+            empties[index], empties[remaining] = empties[remaining], point
+            if not is_eye(game, point, player) and game._check_move(point, player) is None:
+                break
+        else:
+            game.make_move("pass")
+            played.append(size * size)
+            continue
+
+        empties[remaining] = empties[-1]
+        empties.pop()
+        empties.extend(game._commit_stone(point, player))
+        row, col = coords[point]
+        played.append(row * size + col)
+    return played
+
+
+PLAYOUT_POLICIES = {
+    'uniform': uniform_playout,
+    'light': light_playout,
+}
@@ -0,0 +1,247 @@
+from .go_game import BLACK, GoGame
+
+# Letters of the SGF coordinates, 'a' for the first row or column
+_LETTERS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace(']', '\\]')
+
+
+def _point(row, col):
+    return _LETTERS[col] + _LETTERS[row]
+
+
+def game_record(game):
+    """
+    Recovers the setup and the moves of a game from its undo history.
+
+    Parameters:
+    game (GoGame): The game to record, which is left unchanged.
+
+    Returns:
+    tuple: The position before the first move, as a GoGame, and the moves played, as (color, (row, col))
+    with None instead of (row, col) for a pass.
+    """
+    setup = game.clone()
+    while setup.undo_move():
+        pass
+    coords = game._tables.coords
+    moves = []
+    for point, *_, player in game._undo:
+        color = 'B' if player == BLACK else 'W'
+        moves.append((color, coords[point] if point is not None else None))
+    return setup, moves
+
+
+def format_game(game, **properties):
+    """
+    Formats a game as an SGF game tree. Stones on the board before the first move are written
+    as setup stones. The result is added when the game is over, unless given.
+
+    Parameters:
+    game (GoGame): The game to format.
+    properties: Extra root properties, such as PB='name' or RE='B+3'.
+
+    Returns:
+    str: The SGF text of the game, on one line.
+    """
+    setup, moves = game_record(game)
+    root = {'GM': 1, 'FF': 4, 'CA': 'UTF-8', 'SZ': game.board_size, 'KM': 0}
+    if game.is_over and 'RE' not in properties:
+        score = game.calculate_score()
+        margin = abs(score['B Score'] - score['W Score'])
+        root['RE'] = '0' if score['winner'] == 'Tie' else f"{score['winner']}+{margin}"
+    root.update(properties)
+
+    parts = ['(;']
+    for key, value in root.items():
+        parts.append(f'{key}[{_escape(value)}]')
+    for color, symbol in (('AB', 'B'), ('AW', 'W')):
+        stones = [_point(row, col) for row, cells in enumerate(setup.board) for col, cell in enumerate(cells)
+                  if cell == symbol]
+        if stones:
+            parts.append(color + ''.join(f'[{stone}]' for stone in stones))
+    if setup.current_player != 'B':
+        parts.append(f'PL[{setup.current_player}]')
+    for color, move in moves:
+        parts.append(f';{color}[{_point(*move) if move is not None else ""}]')
+    parts.append(')')
+    return ''.join(parts)
+
+
+class SGFWriter:
+    """
+    Appends games to a multi-game SGF file, one game tree per line, flushing after every game
+    so that a long self-play run never holds more than the game being written.
+    """
+    def __init__(self, file):
+        """
+        Parameters:
+        file (str or file): The path of the file to append to, or an open text file.
+        """
+        self._owned = isinstance(file, str)
+        self.file = open(file, 'a', encoding='utf-8') if self._owned else file
+        self.count = 0
+
+    def write(self, game, **properties):
+        """
+        Appends one game, see format_game.
+        """
+        self.file.write(format_game(game, **properties))
+        self.file.write('\n')
+        self.file.flush()
+        self.count += 1
+
+    def close(self):
+        if self._owned:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _game_trees(file, chunk_size):
+    """
+    Yields the text of every top-level game tree of an SGF stream, reading it in chunks.
+    """
+    depth = 0
+    in_value = False
+    escaped = False
+    text = []
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            break
+        start = 0
+        for index, char in enumerate(chunk):
+            if in_value:
+                if escaped:
+                    escaped = False
+                elif char == '\\':
+                    escaped = True
+                elif char == ']':
+                    in_value = False
+            elif char == '[':
+                in_value = True
+            elif char == '(':
+                if depth == 0:
+                    start = index
+                    text = []
+                depth += 1
+            elif char == ')' and depth > 0:
+                depth -= 1
+                if depth == 0:
+                    text.append(chunk[start:index + 1])
+                    yield ''.join(text)
+                    text = []
+        if depth > 0:
+            text.append(chunk[start:])
+    if depth > 0:
+        raise ValueError("SGF stream ends inside a game tree")
+
+
+def _main_line(text):
+    """
+    Parses the nodes of a game tree's main line, which follows the first variation at every branch.
+
+    Returns:
+    list: The properties of every node, as dictionaries of property name to the list of its values.
+    """
+    nodes = []
+    index = 0
+    name = ''
+    length = len(text)
+    while index < length:
+        char = text[index]
+        if char == '[':
+            end = index + 1
+            value = []
+            while text[end] != ']':
+                if text[end] == '\\':
+                    end += 1
+                value.append(text[end])
+                end += 1
+            nodes[-1].setdefault(name, []).append(''.join(value))
+            index = end
+        elif char == ';':
+            nodes.append({})
+            name = ''
+        elif char == ')':
+            # The end of the first variation is the end of the main line
+            break
+        elif char.isalpha():
+            if index == 0 or not text[index - 1].isalpha():
+                name = ''
+            name += char
+        index += 1
+    return nodes
+
+
+def _coords(value, board_size):
+    if value == '' or (value == 'tt' and board_size <= 19):
+        return None
+    return _LETTERS.index(value[1]), _LETTERS.index(value[0])
+
+
+def parse_game(text):
+    """
+    Replays one SGF game tree into a GoGame, following its main line.
+
+    Parameters:
+    text (str): The SGF text of the game tree.
+
+    Returns:
+    tuple: The game after the last move, and the root properties, as a dictionary of property name
+    to the list of its values.
+    """
+    nodes = _main_line(text)
+    if not nodes:
+        raise ValueError("SGF game tree has no nodes")
+    root = nodes[0]
+    board_size = int(root.get('SZ', ['19'])[0].split(':')[0])
+    game = GoGame(board_size)
+
+    setup = [[' '] * board_size for _ in range(board_size)]
+    for name, symbol in (('AB', 'B'), ('AW', 'W')):
+        for value in root.get(name, []):
+            row, col = _coords(value, board_size)
+            setup[row][col] = symbol
+    if 'AB' in root or 'AW' in root:
+        game.board = setup
+    if root.get('PL', ['B'])[0] == 'W':
+        game.current_player, game.opposing_player = 'W', 'B'
+
+    for node in nodes:
+        for color in ('B', 'W'):
+            if color not in node:
+                continue
+            if game.current_player != color:
+                game.current_player, game.opposing_player = color, game.current_player
+            move = _coords(node[color][0], board_size)
+            if not game.make_move(*(move if move is not None else ("pass", 0))):
+                raise ValueError(f"Illegal move {color}[{node[color][0]}] in SGF game")
+    return game, root
+
+
+def read_games(file, chunk_size=65536):
+    """
+    Reads the games of an SGF file or collection lazily, replaying each into a GoGame only when it is reached.
+    Only one game's text is held in memory at a time.
+
+    Parameters:
+    file (str or file): The path of the file, or an open text file.
+    chunk_size (int, optional): The number of characters read at a time. Defaults to 65536.
+
+    Returns:
+    generator: The (game, root properties) of every game, see parse_game.
+    """
+    if isinstance(file, str):
+        with open(file, encoding='utf-8') as stream:
+            yield from read_games(stream, chunk_size)
+        return
+    for text in _game_trees(file, chunk_size):
+        yield parse_game(text)
@@ -0,0 +1,207 @@
+import math
+import random
+import time
+from multiprocessing import shared_memory
+
+# Worker processes receive the lock guarding the shared trees once, when they start
+_lock = None
+
+
+def _init_worker(lock):
+    global _lock
+    _lock = lock
+
+
+class SharedTree:
+    """
+    A search tree stored as a struct of arrays in shared memory, so that several processes can search it.
+    Node 0 is the root. Expanding a node allocates all of its children at once as a contiguous block,
+    in random order, so a node only stores the index of its first child and the number of children.
+    Every node holds its move, packed like the moves of MonteCarloTree nodes, its visits and wins,
+    and the virtual losses of the searches currently passing through it.
+
+    The shared memory is not synchronized. Searches take a lock while they change the statistics
+    or the structure of the tree, and read it without the lock while descending.
+    """
+    # The arrays of the tree: name, format, item size. The 8-byte arrays come first to keep every array aligned.
+    FIELDS = (('visits', 'q', 8), ('wins', 'd', 8), ('move', 'i', 4), ('first_child', 'i', 4),
+              ('child_count', 'i', 4), ('virtual', 'i', 4))
+
+    def __init__(self, capacity, name=None):
+        """
+        Parameters:
+        capacity (int): The most nodes the tree can hold.
+        name (str, optional): The name of an existing tree's shared memory to attach to.
+        Defaults to None, which creates a new tree with only a root.
+        """
+        self.capacity = capacity
+        size = 8 + sum(item_size for _, _, item_size in self.FIELDS) * capacity
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.name = self.memory.name
+
+        buffer = self.memory.buf
+        # The number of nodes allocated
+        self.header = buffer[:8].cast('q')
+        offset = 8
+        for field, format, item_size in self.FIELDS:
+            setattr(self, field, buffer[offset:offset + item_size * capacity].cast(format))
+            offset += item_size * capacity
+
+        if name is None:
+            self.header[0] = 1
+            self.visits[0] = 0
+            self.wins[0] = 0.0
+            self.first_child[0] = -1
+            self.child_count[0] = 0
+            self.virtual[0] = 0
+
+    def __len__(self):
+        return self.header[0]
+
+    def close(self):
+        """
+        Releases this process's views of the shared memory.
+        """
+        for field, _, _ in self.FIELDS:
+            getattr(self, field).release()
+        self.header.release()
+        self.memory.close()
+
+    def unlink(self):
+        """
+        Frees the shared memory, once every process has closed the tree.
+        """
+        self.memory.unlink()
+
+    def expand(self, node, moves):
+        """
+        Allocates the children of a node, unless another search already did. The lock must be held.
+
+        Parameters:
+        node (int): The node to expand.
+        moves (list): The moves of the children.
+
+        Returns:
+        bool: False if the tree is full and the node was left without children.
+        """
+        if self.first_child[node] >= 0:
+            return True
+        first = self.header[0]
+        if first + len(moves) > self.capacity:
+            return False
+        for index, move in enumerate(moves, first):
+            self.move[index] = move
+            self.visits[index] = 0
+            self.wins[index] = 0.0
+            self.first_child[index] = -1
+            self.child_count[index] = 0
+            self.virtual[index] = 0
+        self.child_count[node] = len(moves)
+        self.header[0] = first + len(moves)
+        self.first_child[node] = first
+        return True
+
+    def select_child(self, node):
+        """
+        Selects the child of a node to descend into with the UCT formula, counting every virtual loss
+        as a visit without a win. Children without any visit are taken first, in the order of the block.
+
+        Returns:
+        int: The selected child.
+        """
+        visits = self.visits
+        wins = self.wins
+        virtual = self.virtual
+        first = self.first_child[node]
+        log_visits = math.log(max(1, visits[node] + virtual[node]))
+        best = first
+        best_value = -math.inf
+        for child in range(first, first + self.child_count[node]):
+            count = visits[child] + virtual[child]
+            if count == 0:
+                return child
+            value = wins[child] / count + math.sqrt(2 * log_visits / count)
+            if value > best_value:
+                best = child
+                best_value = value
+        return best
+
+    def root_results(self):
+        """
+        Returns the statistics of the root, in the form MonteCarloTree.merge_root_statistics takes.
+
+        Returns:
+        tuple: The root visits, the root wins, and (move, visits, wins) for every visited root child.
+        """
+        first = self.first_child[0]
+        children = []
+        if first >= 0:
+            for child in range(first, first + self.child_count[0]):
+                if self.visits[child]:
+                    children.append((self.move[child], self.visits[child], self.wins[child]))
+        return self.visits[0], self.wins[0], children
+
+
+def _tree_worker(name, capacity, game, player, options, iterations, time_limit, seed, virtual_loss):
+    """
+    Searches the shared tree from the root position in a worker process, for the given iterations and/or seconds.
+    The lock is taken for every step of the descent, adding a virtual loss to the child chosen, so that
+    other workers see the path as less promising until the result is backpropagated.
+
+    Returns:
+    int: The number of iterations run.
+    """
+    # Imported here, mct imports this module when a tree-parallel search starts
+    from .mct import MonteCarloTree
+
+    random.seed(seed)
+    evaluator = MonteCarloTree(game, **options)
+    evaluator.player = player
+    decode = evaluator.decode_action
+    size = game.board_size
+    tree = SharedTree(capacity, name)
+    deadline = time.monotonic() + time_limit if time_limit is not None else None
+    count = 0
+    try:
+        while iterations is None or count < iterations:
+            state = game.clone()
+            node = 0
+            path = [0]
+            with _lock:
+                tree.virtual[0] += virtual_loss
+            while not state.is_over:
+                if tree.first_child[node] < 0:
+                    moves = [row * size + col for row, col in state.legal_moves()]
+                    if state.pass_counter < 4:
+                        moves.append(size * size)
+                    random.shuffle(moves)
+                    with _lock:
+                        expanded = tree.expand(node, moves)
+                    if not expanded:
+                        break
+                    leaf = True
+                else:
+                    leaf = False
+                with _lock:
+                    node = tree.select_child(node)
+                    tree.virtual[node] += virtual_loss
+                path.append(node)
+                state.make_move(*decode(tree.move[node]))
+                if leaf:
+                    break
+
+            result = evaluator.simulate(None, state)
+            with _lock:
+                for node in path:
+                    tree.virtual[node] -= virtual_loss
+                    tree.visits[node] += evaluator.playouts_per_leaf
+                    tree.wins[node] += result
+            count += 1
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+    finally:
+        tree.close()
+    return count
@@ -0,0 +1,101 @@
+import random
+import pytest
+from .go_game import GoGame, BLACK, WHITE
+from .mct import MonteCarloTree
+
+np = pytest.importorskip("numpy")
+from .batch import BatchPlayout
+
+def boards_of(game, count=1):
+    return np.tile(np.frombuffer(bytes(game._cells), dtype=np.int8), (count, 1))
+
+def test_batch_score_matches_calculate_score():
+    game = GoGame(6)
+    game.board = [
+        [' ', 'B', ' ', ' ', ' ', ' '],
+        ['B', 'B', ' ', ' ', ' ', ' '],
+        [' ', ' ', 'W', 'W', ' ', ' '],
+        [' ', 'W', 'W', 'W', ' ', ' '],
+        [' ', 'W', ' ', 'W', 'B', ' '],
+        [' ', 'W', ' ', 'W', ' ', 'B']
+    ]
+    game.b_captures = 2
+    b_scores, w_scores = BatchPlayout(6).score(boards_of(game), 2, 0)
+    score = game.calculate_score()
+    assert b_scores[0] == score['B Score']
+    assert w_scores[0] == score['W Score']
+
+def test_batch_step_captures():
+    game = GoGame(4)
+    game.board = [
+        ['B', 'B', 'B', 'B'],
+        ['B', 'W', 'B', 'B'],
+        ['B', ' ', 'B', 'B'],
+        ['B', 'B', 'B', ' ']
+    ]
+    batch = BatchPlayout(4, seed=0)
+    batch.reset(game, 1)
+    captures = np.zeros(1, dtype=int)
+    # (3, 3) is black's own eye, so black plays (2, 1) and captures the white stone
+    placed = batch.step(BLACK, np.array([True]), captures)
+    assert placed[0]
+    assert captures[0] == 1
+    game.make_move(2, 1)
+    assert batch.boards.tobytes() == bytes(game._cells)
+    assert sorted(batch.empties[0, :batch.counts[0]]) == sorted(game._tables.points[index] for index in (5, 15))
+
+def test_batch_step_refuses_ko():
+    game = GoGame(4)
+    game.board = [
+        [' ', 'B', 'W', ' '],
+        ['B', 'W', ' ', 'W'],
+        [' ', 'B', 'W', ' '],
+        [' ', ' ', ' ', ' ']
+    ]
+    assert game.make_move(1, 2)  # Black captures at (1, 2), white may not retake at (1, 1) at once
+    batch = BatchPlayout(4, seed=0)
+    batch.reset(game, 64)
+    batch.step(WHITE, np.ones(64, dtype=bool), np.zeros(64, dtype=int))
+    ko = game._tables.points[5]
+    assert not (batch.boards.reshape(64, -1)[:, ko] == WHITE).any()
+
+def test_batch_playouts_replay_on_go_game():
+    for seed in range(5):
+        game = GoGame(7)
+        batch = BatchPlayout(7, seed=seed)
+        batch.reset(game, 1)
+        captures = np.zeros(1, dtype=int)
+        player = BLACK
+        while not game.is_over and len(game.moves) < 100:
+            before = batch.boards.copy()
+            if batch.step(player, np.array([True]), captures)[0]:
+                point = np.flatnonzero(before != batch.boards)
+                point = point[batch.boards[point] == player][0]
+                assert game.make_move(*game._tables.coords[point])
+            else:
+                game.make_move("pass")
+            assert batch.boards.tobytes() == bytes(game._cells)
+            player = 3 - player
+
+def test_batch_run():
+    game = GoGame(5)
+    b_scores, w_scores = BatchPlayout(5, seed=0).run(game, 16)
+    assert len(b_scores) == len(w_scores) == 16
+    assert (b_scores >= 0).all() and (w_scores >= 0).all()
+    assert (b_scores != w_scores).any()
+
+def test_batch_policy_search():
+    random.seed(0)
+    game = GoGame(4)
+    tree = MonteCarloTree(game, policy='batch', batch_size=8)
+    assert tree.best_move(10) in game.get_valid_moves()
+    assert tree.root.visits == 80
+
+def test_batch_policy_search_is_seeded():
+    results = []
+    for _ in range(2):
+        random.seed(0)
+        tree = MonteCarloTree(GoGame(5), policy='batch', batch_size=8)
+        tree.best_move(10)
+        results.append([(child.move, child.visits, child.wins) for child in tree.root.children])
+    assert results[0] == results[1]
@@ -0,0 +1,60 @@
+import pytest
+from .go_game import GoGame
+from .mct import MonteCarloTree
+from .book import OpeningBook, build_book, canonical_key, write_book, _symmetries
+
+def rotated(moves, size, symmetry):
+    permutation = _symmetries(size)[0][symmetry]
+    return [divmod(permutation[row * size + col], size) for row, col in moves]
+
+def play(size, moves):
+    game = GoGame(size)
+    for move in moves:
+        game.make_move(*move)
+    return game
+
+def test_canonical_key_is_symmetric():
+    moves = [(0, 1), (2, 3), (4, 4)]
+    keys = {canonical_key(play(5, rotated(moves, 5, symmetry)))[0] for symmetry in range(8)}
+    assert len(keys) == 1
+    assert canonical_key(play(5, moves))[0] != canonical_key(play(5, moves[:2]))[0]
+    # The player to move is part of the key
+    game = play(5, moves)
+    game.make_move("pass")
+    assert canonical_key(game)[0] != canonical_key(play(5, moves))[0]
+
+def test_lookup_in_every_orientation(tmp_path):
+    path = str(tmp_path / 'book.bin')
+    size = 5
+    game = play(size, [(0, 1)])
+    key, symmetry = canonical_key(game)
+    # White answers at (1, 3), stored in the canonical orientation
+    write_book(path, size, {key: (_symmetries(size)[0][symmetry][1 * size + 3], 10)})
+    with OpeningBook(path) as book:
+        assert len(book) == 1
+        assert book.lookup(game) == (1, 3)
+        for other in range(8):
+            rotated_game = play(size, rotated([(0, 1)], size, other))
+            assert book.lookup(rotated_game) == tuple(rotated([(1, 3)], size, other)[0])
+        assert book.lookup(GoGame(size)) is None
+        assert book.lookup(play(size + 1, [(0, 1)])) is None
+
+def test_build_book_and_best_move(tmp_path):
+    path = str(tmp_path / 'book.bin')
+    count = build_book(path, 5, depth=2, width=2, iterations=20, policy='light')
+    # The empty board and up to two replies, fewer if the replies are symmetric
+    assert 2 <= count <= 3
+    with OpeningBook(path) as book:
+        game = GoGame(5)
+        move = book.lookup(game)
+        assert move in game.get_valid_moves()
+        tree = MonteCarloTree(game, book=book)
+        assert tree.best_move(1000) == move
+        assert tree.iterations_run == 0
+        assert len(tree.root.children) == 0
+
+def test_not_a_book(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'\0' * 32)
+    with pytest.raises(ValueError):
+        OpeningBook(str(path))
@@ -1,3 +1,4 @@
+import random
 import pytest
 from .go_game import GoGame
 
@@ -8,6 +9,16 @@ def test_initialization():
     assert game.opposing_player == 'W'
     assert game.is_over == False
 
+def test_board_view():
+    game = GoGame(6)
+    game.board[2][3] = 'W'
+    assert game.board[2][3] == 'W'
+    assert game.board[2] == [' ', ' ', ' ', 'W', ' ', ' ']
+    assert len(game.board) == 6
+    clone = game.clone()
+    clone.board[2][3] = 'B'
+    assert game.board[2][3] == 'W'
+
 # Testing the find_groups() function
 
 def test_find_groups():
@@ -109,6 +120,27 @@ def test_calculate_score_tie():
     assert score['B Score'] == 3
     assert score['W Score'] == 3
 
+def test_fast_score_matches_calculate_score():
+    game = GoGame(6)
+    game.board = [
+        [' ', 'B', ' ', ' ', ' ', ' '],
+        ['B', 'B', ' ', ' ', ' ', ' '],
+        [' ', ' ', 'W', 'W', ' ', ' '],
+        [' ', 'W', 'W', 'W', ' ', ' '],
+        [' ', 'W', ' ', 'W', 'B', ' '],
+        [' ', 'W', ' ', 'W', ' ', 'B']
+    ]
+    game.b_captures = 2
+    assert game.fast_score() == game.calculate_score()
+    assert GoGame(6).fast_score() == GoGame(6).calculate_score()
+
+    random.seed(0)
+    for _ in range(20):
+        game = GoGame(5)
+        while not game.is_over:
+            game.make_move(*random.choice(game.get_valid_moves()))
+            assert game.fast_score() == game.calculate_score()
+
 # Testing the make_move() function 
 
 def test_make_move_valid():
@@ -127,6 +159,39 @@ def test_make_move_pass():
     assert game.pass_counter == 1
     assert game.current_player == 'W'
 
+def test_make_move_capture():
+    game = GoGame(6)
+    assert game.make_move(0, 1)
+    assert game.make_move(0, 0)
+    assert game.make_move(1, 0)  # Black captures the white corner stone
+    assert game.board[0][0] == ' '
+    assert game.b_captures == 1
+
+def test_make_move_self_capture():
+    game = GoGame(6)
+    game.board[0][1] = 'W'
+    game.board[1][0] = 'W'
+    assert not game.make_move(0, 0)  # Black would have no liberties
+    assert game.board[0][0] == ' '
+    assert game.current_player == 'B'
+
+def test_make_move_ko():
+    game = GoGame(6)
+    game.board = [
+        [' ', 'B', 'W', ' ', ' ', ' '],
+        ['B', 'W', ' ', 'W', ' ', ' '],
+        [' ', 'B', 'W', ' ', ' ', ' '],
+        [' ', ' ', ' ', ' ', ' ', ' '],
+        [' ', ' ', ' ', ' ', ' ', ' '],
+        [' ', ' ', ' ', ' ', ' ', ' ']
+    ]
+    assert game.make_move(1, 2)  # Black captures at (1, 1)
+    assert game.board[1][1] == ' '
+    assert not game.make_move(1, 1)  # White may not retake the ko immediately
+    assert game.make_move(5, 5)
+    assert game.make_move(5, 0)
+    assert game.make_move(1, 1)  # White retakes after playing elsewhere
+
 def test_make_move_game_over():
     game = GoGame(6)
     game.is_over = True
@@ -160,4 +225,112 @@ def test_get_valid_moves_some_positions_filled():
     assert len(valid_moves) == 35  # 34 board positions + pass
     assert ("pass", 0) in valid_moves
     assert (0, 0) not in valid_moves
-    assert (5, 5) not in valid_moves
\ No newline at end of file
+    assert (5, 5) not in valid_moves
+
+def test_is_legal():
+    game = GoGame(6)
+    game.board[0][1] = 'W'
+    game.board[1][0] = 'W'
+    game.board[5][5] = 'W'
+    assert game.is_legal(2, 2)
+    assert game.is_legal("pass")
+    assert not game.is_legal(0, 0)  # Self-capture
+    assert not game.is_legal(5, 5)  # Occupied
+    assert not game.is_legal(6, 0)  # Out of bounds
+
+def test_legal_move_mask():
+    game = GoGame(6)
+    game.board[0][1] = 'W'
+    game.board[1][0] = 'W'
+    mask = game.legal_move_mask()
+    assert not mask & 1  # (0, 0) is self-capture for black
+    assert not mask & (1 << 1)
+    assert bin(mask).count('1') == 33
+    assert len(list(game.legal_moves())) == 33
+
+def test_undo_move():
+    game = GoGame(6)
+    assert game.make_move(0, 1)
+    assert game.make_move(0, 0)
+    assert game.make_move(1, 0)  # Black captures the white corner stone
+    assert game.undo_move()
+    assert game.board[0][0] == 'W'
+    assert game.board[1][0] == ' '
+    assert game.b_captures == 0
+    assert game.current_player == 'B'
+    assert game.make_move(1, 0)  # The capture can be replayed after undoing it
+    assert game.board[0][0] == ' '
+
+def test_undo_move_pass():
+    game = GoGame(6)
+    assert not game.undo_move()  # Nothing to undo
+    for _ in range(4):
+        assert game.make_move("pass")
+    assert game.is_over
+    assert game.undo_move()
+    assert not game.is_over
+    assert game.pass_counter == 3
+    assert game.current_player == 'W'
+
+def test_undo_move_after_changing_the_player():
+    game = GoGame(6)
+    assert game.make_move(0, 0)
+    game.current_player, game.opposing_player = 'B', 'W'  # Black moves twice, as set by a controller
+    assert game.make_move(0, 1)
+    assert game.make_move("pass")
+    assert game.undo_move()
+    assert game.current_player == 'W'
+    assert game.undo_move()
+    assert game.current_player == 'B'
+    assert game.board[0][0] == 'B'
+    assert game.undo_move()
+    assert game.current_player == 'B'
+    assert game.position_hash == GoGame(6).position_hash
+
+def test_position_hash():
+    game = GoGame(6)
+    other = GoGame(6)
+    assert game.position_hash == other.position_hash
+    for move in [(0, 0), (1, 1), (2, 2)]:
+        game.make_move(*move)
+    for move in [(2, 2), (1, 1), (0, 0)]:
+        other.make_move(*move)
+    assert game.position_hash == other.position_hash  # Transposed move orders
+    game.make_move("pass")
+    assert game.position_hash != other.position_hash  # Different player to move
+    game.undo_move()
+    game.undo_move()
+    assert game.position_hash != other.position_hash
+
+def test_superko():
+    board = [
+        [' ', 'B', 'W', ' ', ' ', ' '],
+        ['B', 'W', ' ', 'W', ' ', ' '],
+        [' ', 'B', 'W', ' ', ' ', ' '],
+        [' ', ' ', ' ', ' ', ' ', ' '],
+        [' ', ' ', ' ', ' ', ' ', ' '],
+        [' ', ' ', ' ', ' ', ' ', ' ']
+    ]
+    for superko in [False, True]:
+        game = GoGame(6, superko=superko)
+        game.board = board
+        assert game.make_move(1, 2)  # Black takes the ko
+        assert game.make_move("pass")
+        assert game.make_move("pass")
+        # Retaking would repeat the position from before black's capture
+        assert game.is_legal(1, 1) != superko
+        assert game.make_move(1, 1) != superko
+
+# Testing the board analyses on large regions
+
+def test_find_groups_large_board():
+    game = GoGame(40)
+    game.board = [['B'] * 40 for _ in range(39)] + [[' '] * 40]
+    groups = game.find_groups()
+    assert len(groups) == 1
+    assert len(groups[0]['stones']) == 39 * 40
+    assert groups[0]['stones'][:3] == [(0, 0), (0, 1), (0, 2)]
+    territory = game.find_territory()
+    assert len(territory) == 1
+    assert territory[0]['capturing_player'] == 'B'
+    assert len(territory[0]['stones']) == 40
@@ -0,0 +1,117 @@
+import asyncio
+import io
+import os
+import subprocess
+import sys
+import time
+from .book import OpeningBook, canonical_key, write_book, _symmetries
+from .go_game import GoGame
+from .gtp import GTPEngine
+
+def run_script(engine, script):
+    output = io.StringIO()
+    asyncio.run(engine.run(io.StringIO(script), output))
+    return [response for response in output.getvalue().split('\n\n') if response]
+
+def test_basic_commands():
+    engine = GTPEngine(iterations=10, policy='light')
+    responses = run_script(engine, "1 protocol_version\nname\nknown_command genmove\nboardsize 5\n"
+                                    "play b C3\nplay w C3\n# comment\nbogus\nquit\n")
+    assert responses == ['=1 2', '= GoBot', '= true', '=', '=', '? illegal move', '? unknown command', '=']
+    assert engine.game.board[2][2] == 'B'
+
+def test_illegal_play_keeps_the_player():
+    engine = GTPEngine(board_size=5)
+    responses = run_script(engine, "play b C3\nplay b C3\n")
+    assert responses == ['=', '? illegal move']
+    assert engine.game.current_player == 'W'
+
+def test_undo_same_color_moves():
+    engine = GTPEngine(board_size=5)
+    responses = run_script(engine, "play b A1\nplay b B1\nundo\nundo\n")
+    assert responses == ['='] * 4
+    assert engine.game.current_player == 'B'
+    assert engine.game.board == GoGame(5).board
+    assert engine.game.position_hash == GoGame(5).position_hash
+
+def test_genmove_plays_the_move():
+    engine = GTPEngine(board_size=5, iterations=20, policy='light')
+    responses = run_script(engine, "play b A1\ngenmove w\nundo\ngenmove w\n")
+    assert responses[0] == '='
+    move = responses[1][2:]
+    assert move == 'pass' or engine.parse_vertex(move)
+    assert responses[2] == '='
+    assert engine.game.current_player == 'B'
+    assert engine.tree.root_game.board == engine.game.board
+
+def test_interrupt_stops_search():
+    engine = GTPEngine(board_size=5, iterations=10 ** 9, chunk=5, policy='light')
+    start = time.monotonic()
+    responses = run_script(engine, "genmove b\ninterrupt\nquit\n")
+    assert time.monotonic() - start < 30
+    assert responses[0].startswith('= ')
+    assert responses[1:] == ['=', '=']
+
+def test_gogui_interrupt_stops_search():
+    assert 'gogui-interrupt' in run_script(GTPEngine(), "list_commands\n")[0].split()
+    engine = GTPEngine(board_size=5, iterations=10 ** 9, chunk=5, policy='light')
+    start = time.monotonic()
+    responses = run_script(engine, "genmove b\n# interrupt\nquit\n")
+    assert time.monotonic() - start < 30
+    assert responses[0].startswith('= ')
+    assert responses[1:] == ['=']
+
+def test_quit_waits_for_search():
+    engine = GTPEngine(board_size=5, iterations=200, chunk=5, policy='light')
+    visits = []
+    search = engine.search
+
+    def counted_search(tree, iterations, deadline):
+        move = search(tree, iterations, deadline)
+        visits.append(sum(child.visits for child in tree.root.children))
+        return move
+
+    engine.search = counted_search
+    responses = run_script(engine, "genmove b\nquit\n")
+    assert responses[0].startswith('= ')
+    assert responses[1] == '='
+    assert visits[0] >= 200
+
+def test_genmove_plays_book_move(tmp_path):
+    path = str(tmp_path / 'book.bin')
+    key, symmetry = canonical_key(GoGame(5))
+    # Black opens at (1, 3), D4
+    write_book(path, 5, {key: (_symmetries(5)[0][symmetry][1 * 5 + 3], 10)})
+    with OpeningBook(path) as book:
+        engine = GTPEngine(board_size=5, iterations=10 ** 9, policy='light', book=book)
+        searches = []
+
+        def search(tree, iterations, deadline):
+            searches.append(tree.root_game.clone())
+            return ("pass", 0)
+
+        engine.search = search
+        responses = run_script(engine, "genmove b\ngenmove w\n")
+    assert responses == ['= D4', '= pass']
+    assert engine.game.board[1][3] == 'B'
+    # White's reply is not in the book and is searched
+    assert len(searches) == 1
+
+def test_move_budget():
+    engine = GTPEngine(board_size=9, margin=0)
+    assert engine.move_budget('B') is None
+    engine.cmd_time_settings(['0', '10', '5'])
+    assert engine.move_budget('B') == 2
+    engine.cmd_time_left(['b', '60', '0'])
+    assert engine.move_budget('B') == 60 / 40
+    engine.move_time = 1
+    assert engine.move_budget('B') == 1
+
+def test_stdin_stdout():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, '-m', 'game.gtp', '--iterations', '10'], cwd=root,
+                            input="boardsize 4\ngenmove b\nquit\n", capture_output=True, text=True, timeout=60)
+    responses = [response for response in result.stdout.split('\n\n') if response]
+    assert responses[0] == '='
+    assert responses[1].startswith('= ')
+    assert responses[2] == '='
@@ -0,0 +1,46 @@
+import pytest
+from .match import Engine, play_match_game, run_match, wilson_interval, percentile
+
+def test_engine_parse():
+    engine = Engine.parse('A', "iterations=50,policy=light,rave=True")
+    assert engine.iterations == 50
+    assert engine.options == {'policy': 'light', 'rave': True}
+    with pytest.raises(ValueError):
+        Engine.parse('B', "policy=light")
+
+def test_play_match_game():
+    black = Engine('A', iterations=5, policy='light')
+    white = Engine('B', iterations=5)
+    result = play_match_game(black, white, 4, seed=0, max_moves=20)
+    assert result['winner'] in ('B', 'W', 'Tie')
+    assert 0 < len(result['moves']) <= 20
+    assert len(result['latencies']['B']) + len(result['latencies']['W']) == len(result['moves'])
+
+def test_run_match_alternates_colors():
+    first = Engine('A', iterations=5, policy='light')
+    second = Engine('B', iterations=5, policy='light')
+    summary, results = run_match(first, second, 4, board_size=4, max_moves=20)
+    assert [result['black'] for result in results] == ['A', 'B', 'A', 'B']
+    assert summary['games'] == 4
+    engines = summary['engines']
+    decided = sum(result['winner'] != 'Tie' for result in results)
+    assert engines['A']['wins'] + engines['B']['wins'] == decided
+    assert engines['A']['win_rate'] + engines['B']['win_rate'] == pytest.approx(1)
+    low, high = engines['A']['win_rate_95']
+    assert low <= engines['A']['win_rate'] <= high
+
+def test_run_match_reports_every_game_as_it_finishes():
+    first = Engine('A', iterations=5, policy='light')
+    second = Engine('B', iterations=5, policy='light')
+    reported = []
+    summary, results = run_match(first, second, 3, board_size=4, max_moves=10, on_result=reported.append)
+    assert reported == results
+
+def test_statistics():
+    low, high = wilson_interval(50, 100)
+    assert low == pytest.approx(1 - high)
+    assert 0.40 < low < 0.41
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+    assert percentile([3, 1, 2], 0.5) == 2
+    assert percentile([1, 2], 0.9) == pytest.approx(1.9)
+    assert percentile([], 0.5) is None
@@ -0,0 +1,297 @@
+import random
+import time
+import pytest
+from .go_game import GoGame
+from .mct import MonteCarloTree, Node, TranspositionTable
+
+def test_best_move_is_valid():
+    random.seed(0)
+    game = GoGame(4)
+    move = MonteCarloTree(game).best_move(30)
+    assert move in game.get_valid_moves()
+
+# Testing the transposition table
+
+def test_transposition_table_shares_statistics():
+    table = TranspositionTable()
+    game = GoGame(4)
+    for move in [(0, 0), (1, 1), (2, 2)]:
+        game.make_move(*move)
+    other = GoGame(4)
+    for move in [(2, 2), (1, 1), (0, 0)]:
+        other.make_move(*move)
+    first = MonteCarloTree(game, table).root
+    second = MonteCarloTree(other, table).root
+    first.visits += 1
+    assert second.visits == 1
+    assert len(table) == 1
+
+def test_transposition_table_lru_eviction():
+    table = TranspositionTable(capacity=2)
+    table.lookup('a')
+    table.lookup('b')
+    table.lookup('a')
+    table.lookup('c')  # Evicts 'b', the least recently used
+    assert 'a' in table and 'c' in table and 'b' not in table
+
+def test_transposition_table_visits_eviction():
+    table = TranspositionTable(capacity=2, eviction='visits')
+    table.lookup('a')[0] = 5
+    table.lookup('b')[0] = 1
+    table.lookup('c')  # Evicts 'b', the least visited
+    assert 'a' in table and 'c' in table and 'b' not in table
+
+def test_transposition_table_search():
+    random.seed(0)
+    table = TranspositionTable(capacity=50)
+    game = GoGame(4)
+    tree = MonteCarloTree(game, table)
+    assert tree.best_move(40) in game.get_valid_moves()
+    assert 0 < len(table) <= 50
+    assert tree.root.visits == 40
+
+def test_transposition_table_unknown_eviction():
+    with pytest.raises(ValueError):
+        TranspositionTable(eviction='random')
+
+# Testing tree reuse
+
+def test_advance_keeps_subtree():
+    random.seed(0)
+    game = GoGame(4)
+    tree = MonteCarloTree(game)
+    move = tree.best_move(40)
+    child = next(c for c in tree.root.children if tree.decode_action(c.move) == move)
+    visits = child.visits
+    assert tree.advance(move) is child
+    assert tree.root.parent is None
+    assert tree.root.visits == visits
+    game.make_move(*move)
+    assert tree.root_game.position_hash == game.position_hash
+
+def test_advance_unexplored_move():
+    game = GoGame(4)
+    tree = MonteCarloTree(game)
+    root = tree.advance((1, 2))
+    assert root.visits == 0
+    assert tree.root_game.board[1][2] == 'B'
+    assert game.board[1][2] == ' '  # The tree searches its own copy of the game
+    with pytest.raises(ValueError):
+        tree.advance((1, 2))  # Occupied
+
+# Testing root-parallel search
+
+def test_parallel_search_merges_workers():
+    random.seed(0)
+    game = GoGame(4)
+    tree = MonteCarloTree(game, workers=2)
+    try:
+        move = tree.best_move(20)
+    finally:
+        tree.close()
+    assert move in game.get_valid_moves()
+    assert tree.root.visits == 40
+    assert 0 < sum(child.visits for child in tree.root.children) <= 40
+
+def test_serial_search_after_parallel_search_keeps_merged_children():
+    random.seed(0)
+    tree = MonteCarloTree(GoGame(4), workers=2)
+    try:
+        tree.best_move(20)
+        tree.workers = 1
+        tree.best_move(40)
+    finally:
+        tree.close()
+    moves = [child.move for child in tree.root.children]
+    assert len(moves) == len(set(moves))
+
+# Testing search budgets
+
+def test_best_move_needs_budget():
+    with pytest.raises(ValueError):
+        MonteCarloTree(GoGame(4)).best_move()
+
+def test_best_move_time_limit():
+    random.seed(0)
+    game = GoGame(4)
+    tree = MonteCarloTree(game)
+    move = tree.best_move(time_limit=0.05)
+    assert move in game.get_valid_moves()
+    assert tree.iterations_run >= 1
+    assert tree.root.visits == tree.iterations_run
+
+def test_best_move_past_deadline_runs_once():
+    tree = MonteCarloTree(GoGame(4))
+    tree.best_move(100, deadline=0)
+    assert tree.iterations_run == 1
+
+def test_best_move_early_stop():
+    random.seed(0)
+    game = GoGame(3)
+    for move in [(1, 1), (0, 1), (1, 0), (2, 1), (0, 0), (1, 2)]:
+        game.make_move(*move)
+    tree = MonteCarloTree(game)
+    move = tree.best_move(400, early_stop=True)
+    assert tree.iterations_run < 400
+    assert tree.stopped_early
+    assert move == tree.decode_action(tree.get_most_visited_child(tree.root).move)
+
+def test_best_move_early_stop_without_stopping_keeps_uct_choice():
+    random.seed(0)
+    tree = MonteCarloTree(GoGame(4))
+    move = tree.best_move(5, early_stop=True)
+    assert tree.iterations_run == 5
+    assert not tree.stopped_early
+    assert move == tree.decode_action(tree.get_best_child(tree.root).move)
+
+# Testing compact nodes
+
+def test_nodes_are_compact():
+    random.seed(0)
+    tree = MonteCarloTree(GoGame(4))
+    tree.best_move(30)
+    child = tree.root.children[0]
+    assert not hasattr(child, '__dict__')
+    assert isinstance(child.move, int)
+    assert tree.encode_action(tree.decode_action(child.move)) == child.move
+    assert tree.decode_action(tree.pass_move) == ("pass", 0)
+
+def test_untried_actions_are_cached():
+    random.seed(0)
+    game = GoGame(4)
+    tree = MonteCarloTree(game)
+    tree.best_move(5)
+    root = tree.root
+    assert len(root.children) == 5
+    assert len(root.untried) == len(game.get_valid_moves()) - 5
+    expanded = {child.move for child in root.children}
+    assert expanded.isdisjoint(root.untried)
+    assert root.untried_actions(game, tree.pass_move) is root.untried
+
+# Testing playout policies
+
+def test_light_policy_search():
+    random.seed(0)
+    game = GoGame(5)
+    tree = MonteCarloTree(game, policy='light')
+    assert tree.best_move(50) in game.get_valid_moves()
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        MonteCarloTree(GoGame(4), policy='heavy')
+
+# Testing RAVE
+
+def test_rave_search():
+    random.seed(0)
+    game = GoGame(5)
+    tree = MonteCarloTree(game, policy='light', rave=True)
+    assert tree.best_move(50) in game.get_valid_moves()
+    amaf = tree.root.amaf
+    assert amaf and tree.pass_move not in amaf
+    # Every root child but the pass was played first in its own simulations at least
+    for child in tree.root.children:
+        if child.move != tree.pass_move:
+            assert amaf[child.move][0] >= 1
+    assert all(0 < visits <= tree.root.visits for visits, _ in amaf.values())
+
+def test_update_amaf_counts_first_moves_of_player():
+    game = GoGame(4)
+    tree = MonteCarloTree(game, rave=True)
+    child = Node(move=0, parent=tree.root)
+    tree.root.add_child(child)
+    # Black played 0 and 2, White played 1 and 3, and a move played again only counts the first time
+    tree.update_amaf(child, [1, 2, 3, 0, tree.pass_move], 1)
+    assert tree.root.amaf == {0: [1, 1], 2: [1, 1]}
+    assert child.amaf == {1: [1, 1], 3: [1, 1]}
+    assert tree.rave_beta(0) == 1
+    assert tree.rave_beta(1000) < tree.rave_beta(10)
+
+def test_rave_with_batch_policy():
+    with pytest.raises(ValueError):
+        MonteCarloTree(GoGame(4), policy='batch', rave=True)
+
+# Testing search statistics and hooks
+
+def test_search_stats():
+    random.seed(0)
+    game = GoGame(4)
+    tree = MonteCarloTree(game, policy='light', collect_stats=True)
+    tree.best_move(30)
+    stats = tree.stats
+    assert stats.iterations == stats.playouts == 30
+    assert stats.nodes_created == sum(1 for _ in walk(tree.root)) - 1
+    assert 1 <= stats.max_depth and 1 <= stats.mean_depth <= stats.max_depth
+    assert stats.mean_playout_length > 0
+    assert stats.seconds >= stats.select_time + stats.expand_time + stats.simulate_time + stats.backpropagate_time
+    assert stats.as_dict()['iterations'] == 30
+
+def test_stats_off_by_default():
+    tree = MonteCarloTree(GoGame(4))
+    tree.best_move(5)
+    assert tree.stats is None
+
+def test_search_hooks():
+    random.seed(0)
+    tree = MonteCarloTree(GoGame(4))
+    iterations = []
+    searches = []
+    tree.add_hook('iteration', lambda tree, node, result: iterations.append(result))
+    tree.add_hook('search', lambda tree, stats: searches.append(stats))
+    tree.best_move(10)
+    assert len(iterations) == 10
+    assert searches == [tree.stats]
+    with pytest.raises(ValueError):
+        tree.add_hook('playout', print)
+
+def test_search_with_stats_builds_the_same_tree():
+    trees = []
+    for collect_stats in (False, True):
+        random.seed(0)
+        tree = MonteCarloTree(GoGame(4), policy='light', rave=True, collect_stats=collect_stats)
+        tree.best_move(40)
+        trees.append([(node.move, node.visits, node.wins) for node in walk(tree.root)])
+    assert trees[0] == trees[1]
+
+def test_parallel_search_stats():
+    random.seed(0)
+    tree = MonteCarloTree(GoGame(4), workers=2, collect_stats=True)
+    try:
+        tree.best_move(10)
+    finally:
+        tree.close()
+    assert tree.stats.iterations == 20
+
+def walk(node):
+    yield node
+    for child in node.children:
+        yield from walk(child)
+
+# Testing pondering
+
+def test_pondering_keeps_statistics():
+    random.seed(0)
+    game = GoGame(4)
+    tree = MonteCarloTree(game, policy='light')
+    tree.start_pondering(chunk=5)
+    assert tree.is_pondering
+    deadline = time.monotonic() + 5
+    while tree.root.visits < 50 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    pondered = tree.stop_pondering()
+    assert not tree.is_pondering
+    assert pondered >= 50 and pondered % 5 == 0
+    assert tree.root.visits == pondered
+
+    child = max(tree.root.children, key=lambda c: c.visits)
+    visits = child.visits
+    assert tree.advance(tree.decode_action(child.move)) is child
+    assert tree.root.visits == visits
+
+def test_best_move_stops_pondering():
+    random.seed(0)
+    game = GoGame(4)
+    tree = MonteCarloTree(game)
+    tree.start_pondering()
+    assert tree.best_move(5) in game.get_valid_moves()
+    assert not tree.is_pondering
@@ -0,0 +1,54 @@
+import random
+from .go_game import GoGame, BLACK, WHITE
+from .playout import is_eye, light_playout, uniform_playout
+
+def point(game, row, col):
+    return (row + 1) * (game.board_size + 2) + col + 1
+
+def test_is_eye():
+    game = GoGame(6)
+    game.board = [
+        [' ', 'B', ' ', ' ', ' ', ' '],
+        ['B', 'B', ' ', 'B', ' ', ' '],
+        [' ', ' ', 'B', ' ', 'B', ' '],
+        [' ', ' ', 'W', 'B', 'W', ' '],
+        [' ', ' ', ' ', ' ', ' ', ' '],
+        [' ', ' ', ' ', ' ', ' ', ' ']
+    ]
+    assert is_eye(game, point(game, 0, 0), BLACK)
+    assert not is_eye(game, point(game, 0, 0), WHITE)
+    assert not is_eye(game, point(game, 2, 3), BLACK)  # Two enemy diagonals make a false eye
+    assert not is_eye(game, point(game, 4, 4), BLACK)
+
+def test_light_playout_finishes_game():
+    random.seed(0)
+    game = GoGame(6)
+    played = light_playout(game)
+    assert game.is_over
+    assert played[-4:] == [36, 36, 36, 36]  # Ends with four passes
+    assert len(played) == len(game.moves) + played.count(36)
+
+def test_light_playout_leaves_no_captured_groups():
+    random.seed(1)
+    game = GoGame(5)
+    light_playout(game)
+    for row in range(5):
+        for col in range(5):
+            if game.board[row][col] == ' ':
+                continue
+            # Every stone left on the board still has a liberty at the end of the game
+            assert not all(group['captured'] for group in game.find_groups() if (row, col) in group['stones'])
+
+def test_light_playout_move_cap():
+    random.seed(0)
+    game = GoGame(6)
+    played = light_playout(game, max_moves=10)
+    assert len(played) == 10
+    assert not game.is_over
+
+def test_uniform_playout():
+    random.seed(0)
+    game = GoGame(4)
+    played = uniform_playout(game)
+    assert game.is_over
+    assert all(0 <= move <= 16 for move in played)
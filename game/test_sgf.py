@@ -0,0 +1,77 @@
+import io
+import random
+import pytest
+from .go_game import GoGame
+from .playout import light_playout
+from .sgf import SGFWriter, format_game, game_record, parse_game, read_games
+
+def test_format_game():
+    game = GoGame(5)
+    game.make_move(0, 1)
+    game.make_move("pass")
+    game.make_move(2, 3)
+    assert format_game(game, PB='Bot') == "(;GM[1]FF[4]CA[UTF-8]SZ[5]KM[0]PB[Bot];B[ba];W[];B[dc])"
+
+def test_round_trip():
+    random.seed(0)
+    games = []
+    for size in (5, 9):
+        game = GoGame(size)
+        light_playout(game)
+        games.append(game)
+    stream = io.StringIO()
+    with SGFWriter(stream) as writer:
+        for game in games:
+            writer.write(game, C='a comment with ] and ( inside')
+    assert writer.count == 2
+
+    stream.seek(0)
+    # A small chunk size splits games and values over several reads
+    for (game, properties), original in zip(read_games(stream, chunk_size=5), games):
+        assert game.board == original.board
+        assert game_record(game)[1] == game_record(original)[1]
+        assert game.is_over == original.is_over
+        assert properties['C'] == ['a comment with ] and ( inside']
+        assert properties['RE'] == [format_game(original).split('RE[')[1].split(']')[0]]
+
+    # Consecutive moves of one color keep their colors
+    game, _ = parse_game("(;SZ[4];B[aa];B[bb];W[cc])")
+    text = format_game(game)
+    assert 'PL[' not in text
+    assert text.endswith(';B[aa];B[bb];W[cc])')
+    assert game_record(parse_game(text)[0])[1] == game_record(game)[1]
+
+def test_setup_stones_and_player():
+    game = GoGame(4)
+    game.board = [
+        ['B', ' ', ' ', ' '],
+        [' ', ' ', ' ', ' '],
+        [' ', ' ', 'W', ' '],
+        [' ', ' ', ' ', ' ']
+    ]
+    game.current_player, game.opposing_player = 'W', 'B'
+    game.make_move(1, 1)
+    text = format_game(game)
+    assert 'AB[aa]AW[cc]PL[W];W[bb]' in text
+    replayed, _ = parse_game(text)
+    assert replayed.board == game.board
+    assert replayed.current_player == 'B'
+
+def test_main_line_and_files(tmp_path):
+    path = str(tmp_path / 'games.sgf')
+    with open(path, 'w') as file:
+        file.write("(;SZ[4];B[aa](;W[bb];B[cc])(;W[dd]))\n(;SZ[4]AB[aa][ab];W[tt])")
+    games = list(read_games(path))
+    assert len(games) == 2
+    first, properties = games[0]
+    assert properties['SZ'] == ['4']
+    assert first.board[1][1] == 'W' and first.board[2][2] == 'B' and first.board[3][3] == ' '
+    second, _ = games[1]
+    assert second.board[1][0] == 'B'
+    assert second.pass_counter == 1
+
+def test_illegal_move():
+    with pytest.raises(ValueError):
+        parse_game("(;SZ[4];B[aa];W[aa])")
+    with pytest.raises(ValueError):
+        list(read_games(io.StringIO("(;SZ[4];B[aa]")))
@@ -0,0 +1,67 @@
+import random
+import pytest
+from .go_game import GoGame
+from .mct import MonteCarloTree
+from .shared_tree import SharedTree
+
+def test_shared_tree_expand_and_select():
+    tree = SharedTree(8)
+    try:
+        assert len(tree) == 1
+        assert tree.expand(0, [3, 5, 7])
+        assert len(tree) == 4
+        # Expanding again keeps the first children
+        assert tree.expand(0, [1, 2])
+        assert tree.child_count[0] == 3
+        # The tree has room for four more nodes only
+        assert not tree.expand(1, [0, 1, 2, 4, 6])
+        assert tree.first_child[1] == -1
+
+        first = tree.first_child[0]
+        assert tree.select_child(0) == first
+        tree.virtual[first] = 1
+        assert tree.select_child(0) == first + 1
+        for child, wins in zip(range(first, first + 3), (0.0, 1.0, 0.0)):
+            tree.visits[child] = 1
+            tree.wins[child] = wins
+        tree.visits[0] = 3
+        tree.virtual[first] = 0
+        assert tree.select_child(0) == first + 1
+
+        tree.wins[0] = 1.0
+        assert tree.root_results() == (3, 1.0, [(3, 1, 0.0), (5, 1, 1.0), (7, 1, 0.0)])
+    finally:
+        tree.close()
+        tree.unlink()
+
+def test_shared_tree_attach():
+    tree = SharedTree(4)
+    try:
+        other = SharedTree(4, tree.name)
+        other.expand(0, [1])
+        other.visits[1] = 2
+        other.close()
+        assert len(tree) == 2
+        assert tree.visits[tree.first_child[0]] == 2
+    finally:
+        tree.close()
+        tree.unlink()
+
+def test_tree_parallel_search():
+    random.seed(0)
+    game = GoGame(4)
+    tree = MonteCarloTree(game, workers=2, parallel='tree', policy='light')
+    try:
+        move = tree.best_move(20)
+    finally:
+        tree.close()
+    assert move in game.get_valid_moves()
+    assert tree.iterations_run == 40
+    assert tree.root.visits == 40
+    assert sum(child.visits for child in tree.root.children) == 40
+
+def test_tree_parallel_options():
+    with pytest.raises(ValueError):
+        MonteCarloTree(GoGame(4), parallel='leaf')
+    with pytest.raises(ValueError):
+        MonteCarloTree(GoGame(4), parallel='tree', rave=True)
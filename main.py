@@ -1,9 +1,58 @@
+import argparse
+
 from game.go_game import GoGame
 from game.mct import MonteCarloTree
 
-def play_game():
-    board_size = 6
+def get_user_move(game, board_size):
+    """
+    Asks the user for a move until a valid one is entered, and plays it.
+
+    Returns:
+    tuple: The move played, as (row, col) or ("pass", 0).
+    """
+    while True:
+        user_input = input("Enter 'pass' to pass or enter X and Y coordinates (e.g., '2 3'): ").strip().lower()
+        if user_input == "pass":
+            game.make_move("pass")
+            return ("pass", 0)
+        else:
+            try:
+                x, y = map(int, user_input.split())
+                if 0 <= x < board_size and 0 <= y < board_size:
+                    if game.make_move(x, y, live=True):
+                        return (x, y)
+                else:
+                    print("Invalid coordinates. Please enter coordinates within the board size.")
+            except ValueError:
+                print("Invalid input. Please enter 'pass' or two integers separated by a space.")
+
+def get_bot_move(game, tree):
+    """
+    Searches for the bot's move and plays it. The tree is kept between turns
+    and advanced by every move played, so the search under the actual moves is reused.
+
+    Returns:
+    MonteCarloTree: The tree, advanced past the bot's move.
+    """
+    if tree is None:
+        tree = MonteCarloTree(game, policy='light')
+    best_move = tree.best_move(iterations=100)
+    game.make_move(best_move[0], best_move[1])
+    tree.advance(best_move)
+    game.print_board()
+    return tree
+
+def play_game(board_size=6, ponder=True):
+    """
+    Plays a game between the user and the bot on the console.
+
+    Parameters:
+    board_size (int, optional): The size of the board, such as 9, 13 or 19. Defaults to 6.
+    ponder (bool, optional): Whether the bot keeps searching while waiting for the user's move.
+    The search continues from the user's move when it arrives. Defaults to True.
+    """
     game = GoGame(board_size)
+    tree = None
 
     while True:
         print("Do you want to move first or second? (first/second)")
@@ -14,50 +63,35 @@ def play_game():
 
     if user_turn == "first":
         while not game.is_over:
-            while True:
-                user_input = input("Enter 'pass' to pass or enter X and Y coordinates (e.g., '2 3'): ").strip().lower()
-                if user_input == "pass":
-                    game.make_move("pass")
-                    break
-                else:
-                    try:
-                        x, y = map(int, user_input.split())
-                        if 0 <= x < board_size and 0 <= y < board_size:
-                            game.make_move(x, y, live=True)
-                            break
-                        else:
-                            print("Invalid coordinates. Please enter coordinates within the board size.")
-                    except ValueError:
-                        print("Invalid input. Please enter 'pass' or two integers separated by a space.")
-
-            tree = MonteCarloTree(game)
-            best_move = tree.best_move(iterations=100)
-            game.make_move(best_move[0], best_move[1])
-            game.print_board()
+            if ponder and tree is not None:
+                tree.start_pondering()
+            user_move = get_user_move(game, board_size)
+            if game.is_over:
+                break
+            if tree is not None:
+                tree.advance(user_move)
+            tree = get_bot_move(game, tree)
 
         print(game.calculate_score())
     elif user_turn == "second":
         while not game.is_over:
-            tree = MonteCarloTree(game)
-            best_move = tree.best_move(100)
-            game.make_move(best_move[0], best_move[1])
-            game.print_board()
-
-            while True:
-                user_input = input("Enter 'pass' to pass or enter X and Y coordinates (e.g., '2 3'): ").strip().lower()
-                if user_input == "pass":
-                    game.make_move("pass")
-                    break
-                else:
-                    try:
-                        x, y = map(int, user_input.split())
-                        if 0 <= x < board_size and 0 <= y < board_size:
-                            game.make_move(x, y, live=True)
-                            break
-                        else:
-                            print("Invalid coordinates. Please enter coordinates within the board size.")
-                    except ValueError:
-                        print("Invalid input. Please enter 'pass' or two integers separated by a space.")
+            tree = get_bot_move(game, tree)
+            if game.is_over:
+                break
+
+            if ponder:
+                tree.start_pondering()
+            user_move = get_user_move(game, board_size)
+            tree.advance(user_move)
+
+    if tree is not None:
+        tree.close()
 
 if __name__ == "__main__":
-    play_game()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Play Go against the Monte Carlo tree search bot.")
+    parser.add_argument('--size', type=int, default=6, help="size of the board, such as 9, 13 or 19")
+    parser.add_argument('--no-ponder', action='store_true', help="do not search while waiting for your move")
+    args = parser.parse_args()
+    if args.size < 2:
+        parser.error("the board size must be at least 2")
+    play_game(args.size, ponder=not args.no_ponder)